@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Ohne Redis liegen die Sessions im Speicher eines einzelnen Workers
+REDIS_URL = os.environ.get('ASRS_REDIS_URL')
+
+# Start: gunicorn -c gunicorn.conf.py src.main:app
+bind = os.environ.get('ASRS_BIND', '0.0.0.0:5002')
+workers = int(os.environ.get('ASRS_WORKERS', 2 if REDIS_URL else 1))
+timeout = 300
+
+# App (inkl. vorgewärmter Modelle) einmal im Master laden; die Worker teilen die Seiten per Copy-on-Write
+preload_app = True
+
+
+def on_starting(server):
+    """Verhindert mehrere Worker ohne gemeinsamen Session-Speicher (sonst 404 für Sessions anderer Worker)."""
+    if server.cfg.workers > 1 and not REDIS_URL:
+        server.log.error('Mehrere Worker benötigen ASRS_REDIS_URL als gemeinsamen Session-Speicher.')
+        sys.exit(1)
+
+
+def post_fork(server, worker):
+    """
+    Ein Torch-Thread pro Worker, wenn die NLP-Inferenz ohnehin in Celery-Workern läuft.
+    Ohne Celery rechnen die Gunicorn-Worker selbst und sollen alle Kerne nutzen.
+    """
+    from src.tasks import CELERY_ENABLED
+    if not CELERY_ENABLED:
+        return
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
@@ -1,37 +1,150 @@
 import pandas as pd
 import numpy as np
 import re
+import os
+from functools import partial
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import dask.dataframe as dd
+    DASK_AVAILABLE = True
+except ImportError:
+    DASK_AVAILABLE = False
+
+# Nach lower() genügt eine ASCII-Klasse: fasst Sonderzeichen und Leerraum in einem Durchlauf zusammen
+_RE_CLEAN = re.compile(r'[^a-z0-9]+')
+
+MOTOR_KEYWORDS = (
+    'engine', 'motor', 'turbine', 'compressor', 'combustor', 'fan', 'rotor',
+    'stator', 'blade', 'vane', 'nozzle', 'thrust', 'power', 'rpm', 'egt',
+    'fuel', 'oil', 'hydraulic', 'pneumatic', 'bleed', 'starter', 'ignition',
+    'vibration', 'surge', 'stall', 'flameout', 'shutdown', 'failure',
+    'malfunction', 'anomaly', 'warning', 'caution', 'alert'
+)
+
+AIRCRAFT_TYPES = {
+    'boeing': ('b737', 'b747', 'b757', 'b767', 'b777', 'b787'),
+    'airbus': ('a319', 'a320', 'a321', 'a330', 'a340', 'a350', 'a380'),
+    'embraer': ('e170', 'e175', 'e190', 'e195'),
+    'bombardier': ('crj', 'dash'),
+    'other': ('md80', 'md90', 'dc9', 'dc10')
+}
+
+FLIGHT_PHASES = (
+    'taxi', 'takeoff', 'climb', 'cruise', 'descent', 'approach', 'landing',
+    'ground', 'parked', 'maintenance'
+)
+
+# Einmal beim Import kompiliert und von allen Instanzen und Worker-Prozessen geteilt.
+# Bewusst ohne Wortgrenzen: wie bisher Teilstring-Suche, damit auch "engines" oder "failures" treffen
+_MOTOR_RE = re.compile('|'.join(map(re.escape, MOTOR_KEYWORDS)), re.IGNORECASE)
+_AC_PATTERN = re.compile('(' + '|'.join(re.escape(t) for types in AIRCRAFT_TYPES.values() for t in types) + ')')
+_AC_MAP = {t: f"{m}_{t}" for m, types in AIRCRAFT_TYPES.items() for t in types}
+_PHASE_PATTERN = re.compile('(' + '|'.join(map(re.escape, FLIGHT_PHASES)) + ')')
+
+
+def _filter_motor_partition(partition: pd.DataFrame, search_columns: List[str], pattern: re.Pattern) -> pd.DataFrame:
+    """Filtert eine Dask-Partition nach Motor-Keywords (modulweit, damit picklebar)."""
+    motor_mask = pd.Series(False, index=partition.index)
+    for col in search_columns:
+        remaining = ~motor_mask
+        if not remaining.any():
+            break
+        motor_mask[remaining] = partition.loc[remaining, col].fillna('').astype(str).str.contains(pattern, na=False)
+    return partition[motor_mask]
+
+
+def _clean_text_partition(partition: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Erzeugt die *_processed-Spalten für eine Dask-Partition (modulweit, damit picklebar)."""
+    return partition.assign(**{
+        f'{col}_processed': partition[col].fillna('Unknown').astype(str).str.lower()
+        .str.replace(_RE_CLEAN, ' ', regex=True).str.strip()
+        for col in columns
+    })
+
 
 class ASRSDataProcessor:
     """
     Klasse für die Vorverarbeitung von ASRS-Daten mit Fokus auf motorbezogene Probleme.
     """
     
+    # Spalten, die beim Laden gelesen werden (None = alle Spalten)
+    required_columns: Optional[List[str]] = None
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.motor_keywords = [
-            'engine', 'motor', 'turbine', 'compressor', 'combustor', 'fan', 'rotor',
-            'stator', 'blade', 'vane', 'nozzle', 'thrust', 'power', 'rpm', 'egt',
-            'fuel', 'oil', 'hydraulic', 'pneumatic', 'bleed', 'starter', 'ignition',
-            'vibration', 'surge', 'stall', 'flameout', 'shutdown', 'failure',
-            'malfunction', 'anomaly', 'warning', 'caution', 'alert'
-        ]
-        
-        self.aircraft_types = {
-            'boeing': ['b737', 'b747', 'b757', 'b767', 'b777', 'b787'],
-            'airbus': ['a319', 'a320', 'a321', 'a330', 'a340', 'a350', 'a380'],
-            'embraer': ['e170', 'e175', 'e190', 'e195'],
-            'bombardier': ['crj', 'dash'],
-            'other': ['md80', 'md90', 'dc9', 'dc10']
-        }
+        self.motor_keywords = MOTOR_KEYWORDS
+        self.aircraft_types = AIRCRAFT_TYPES
+        self.flight_phases = FLIGHT_PHASES
+        
+        # Vorkompilierte Muster und Lookup-Tabellen auf Modulebene
+        self._motor_re = _MOTOR_RE
+        self._ac_pattern = _AC_PATTERN
+        self._ac_map = _AC_MAP
+        self._phase_pattern = _PHASE_PATTERN
+        
+        # Optionaler Hyperscan-DFA für den Keyword-Scan (ein linearer Durchlauf pro Text)
+        self._hs_db = self._build_hyperscan_db() if HYPERSCAN_AVAILABLE else None
+        
+        # Ab dieser Zeilenzahl lohnt sich die Verteilung auf mehrere Prozesse mit Dask
+        self.dask_min_rows = 100_000
+    
+    def _build_hyperscan_db(self):
+        """Kompiliert die Motor-Keywords in eine Hyperscan-Datenbank."""
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=[re.escape(k).encode() for k in self.motor_keywords],
+                ids=list(range(len(self.motor_keywords))),
+                elements=len(self.motor_keywords),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(self.motor_keywords)
+            )
+            return db
+        except Exception as e:
+            self.logger.warning(f"Hyperscan-Datenbank konnte nicht kompiliert werden: {e}")
+            return None
+    
+    def _hyperscan_mask(self, texts: pd.Series) -> pd.Series:
+        """
+        Prüft jeden Text mit der Hyperscan-Datenbank auf Motor-Keywords.
         
-        self.flight_phases = [
-            'taxi', 'takeoff', 'climb', 'cruise', 'descent', 'approach', 'landing',
-            'ground', 'parked', 'maintenance'
-        ]
+        Args:
+            texts: Serie mit Texten
+            
+        Returns:
+            Boolesche Maske mit dem Index der Eingabe
+        """
+        def on_match(pattern_id, start, end, flags, context):
+            context['hit'] = True
+        
+        hits = []
+        for text in texts.fillna('').astype(str):
+            context = {'hit': False}
+            self._hs_db.scan(text.encode('utf-8'), match_event_handler=on_match, context=context)
+            hits.append(context['hit'])
+        
+        return pd.Series(hits, index=texts.index, dtype=bool)
     
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
@@ -44,23 +157,47 @@ class ASRSDataProcessor:
             DataFrame mit den geladenen Daten
         """
         try:
-            df = pd.read_csv(file_path, encoding='utf-8')
+            read_kwargs = {'encoding': 'utf-8'}
+            if self.required_columns is not None:
+                # Nur vorhandene Spalten anfordern, fehlende sind kein Fehler
+                header = pd.read_csv(file_path, encoding='utf-8', nrows=0).columns
+                read_kwargs['usecols'] = [col for col in header if col in self.required_columns]
+            
+            df = None
+            if PYARROW_AVAILABLE:
+                try:
+                    # Multithreaded C++-Parser; Narrative enthalten oft Zeilenumbrüche in Anführungszeichen,
+                    # die pandas' engine='pyarrow' nicht unterstützt
+                    convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+                    if 'usecols' in read_kwargs:
+                        convert_options.include_columns = read_kwargs['usecols']
+                    df = pacsv.read_csv(
+                        file_path,
+                        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+                        convert_options=convert_options
+                    ).to_pandas()
+                except Exception as e:
+                    self.logger.warning(f"PyArrow-Parser fehlgeschlagen, verwende Standard-Parser: {e}")
+            
+            if df is None:
+                df = pd.read_csv(file_path, **read_kwargs)
+            
             self.logger.info(f"Daten erfolgreich geladen: {len(df)} Zeilen")
             return df
         except Exception as e:
             self.logger.error(f"Fehler beim Laden der Daten: {e}")
             raise
     
-    def filter_motor_related(self, df: pd.DataFrame, text_columns: List[str] = None) -> pd.DataFrame:
+    def _resolve_search_columns(self, df: pd.DataFrame, text_columns: List[str] = None) -> List[str]:
         """
-        Filtert Berichte nach motorbezogenen Problemen.
+        Ermittelt die Spalten, die nach Motor-Keywords durchsucht werden.
         
         Args:
             df: Input DataFrame
             text_columns: Liste der Textspalten zum Durchsuchen
             
         Returns:
-            Gefiltertes DataFrame
+            Liste der vorhandenen Suchspalten
         """
         if text_columns is None:
             # Standardspalten für ASRS-Berichte
@@ -73,14 +210,95 @@ class ASRSDataProcessor:
             self.logger.warning("Keine Textspalten gefunden, verwende alle Spalten")
             available_columns = df.select_dtypes(include=['object']).columns.tolist()
         
+        return available_columns
+    
+    def _filter_and_clean_polars(self, df: pd.DataFrame, text_columns: List[str],
+                                 processed_columns: List[str]) -> pd.DataFrame:
+        """
+        Filtert motorbezogene Berichte und bereitet Textspalten in einem einzigen Polars-Lazy-Plan auf.
+        
+        Args:
+            df: Input DataFrame
+            text_columns: Liste der Textspalten zum Durchsuchen
+            processed_columns: Textspalten, für die *_processed erzeugt wird
+            
+        Returns:
+            Gefiltertes DataFrame inklusive *_processed-Spalten
+        """
+        search_columns = self._resolve_search_columns(df, text_columns)
+        motor_pattern = '(?i)' + self._motor_re.pattern
+        
+        lf = pl.from_pandas(df).lazy().filter(
+            pl.any_horizontal([
+                pl.col(col).cast(pl.Utf8).fill_null('').str.contains(motor_pattern)
+                for col in search_columns
+            ])
+        ).with_columns([
+            # Fehlende Texte wie in handle_missing_values als 'Unknown' behandeln
+            pl.col(col).cast(pl.Utf8).fill_null('Unknown').str.to_lowercase()
+            .str.replace_all(_RE_CLEAN.pattern, ' ').str.strip_chars()
+            .alias(f'{col}_processed')
+            for col in processed_columns
+        ])
+        
+        filtered_df = lf.collect().to_pandas()
+        self.logger.info(f"Motorbezogene Berichte gefiltert (Polars): {len(filtered_df)} von {len(df)}")
+        
+        return filtered_df
+    
+    def _filter_and_clean_dask(self, df: pd.DataFrame, text_columns: List[str],
+                               processed_columns: List[str]) -> pd.DataFrame:
+        """
+        Filtert motorbezogene Berichte und bereitet Textspalten parallel über Dask-Partitionen auf.
+        
+        Args:
+            df: Input DataFrame
+            text_columns: Liste der Textspalten zum Durchsuchen
+            processed_columns: Textspalten, für die *_processed erzeugt wird
+            
+        Returns:
+            Gefiltertes DataFrame inklusive *_processed-Spalten
+        """
+        search_columns = self._resolve_search_columns(df, text_columns)
+        filter_partition = partial(_filter_motor_partition, search_columns=search_columns, pattern=self._motor_re)
+        clean_partition = partial(_clean_text_partition, columns=processed_columns)
+        
+        ddf = dd.from_pandas(df, npartitions=os.cpu_count() or 1)
+        ddf = ddf.map_partitions(filter_partition, meta=df.iloc[:0])
+        ddf = ddf.map_partitions(clean_partition, meta=clean_partition(df.iloc[:0]))
+        
+        filtered_df = ddf.compute(scheduler='processes')
+        self.logger.info(f"Motorbezogene Berichte gefiltert (Dask): {len(filtered_df)} von {len(df)}")
+        
+        return filtered_df
+    
+    def filter_motor_related(self, df: pd.DataFrame, text_columns: List[str] = None) -> pd.DataFrame:
+        """
+        Filtert Berichte nach motorbezogenen Problemen.
+        
+        Args:
+            df: Input DataFrame
+            text_columns: Liste der Textspalten zum Durchsuchen
+            
+        Returns:
+            Gefiltertes DataFrame
+        """
+        available_columns = self._resolve_search_columns(df, text_columns)
+        
         # Motor-Keywords in allen verfügbaren Textspalten suchen
-        motor_mask = pd.Series([False] * len(df))
+        motor_mask = pd.Series(False, index=df.index)
         
         for col in available_columns:
             if col in df.columns:
-                col_text = df[col].fillna('').astype(str).str.lower()
-                for keyword in self.motor_keywords:
-                    motor_mask |= col_text.str.contains(keyword, case=False, na=False)
+                # Bereits gefundene Berichte nicht in weiteren Spalten erneut durchsuchen
+                remaining = ~motor_mask
+                if not remaining.any():
+                    break
+                texts = df.loc[remaining, col]
+                if self._hs_db is not None:
+                    motor_mask[remaining] = self._hyperscan_mask(texts)
+                else:
+                    motor_mask[remaining] = texts.fillna('').astype(str).str.contains(self._motor_re, na=False)
         
         filtered_df = df[motor_mask].copy()
         self.logger.info(f"Motorbezogene Berichte gefiltert: {len(filtered_df)} von {len(df)}")
@@ -97,17 +315,13 @@ class ASRSDataProcessor:
         Returns:
             DataFrame mit behandelten fehlenden Werten
         """
-        df_clean = df.copy()
-        
         # Numerische Spalten mit Median füllen
-        numeric_columns = df_clean.select_dtypes(include=[np.number]).columns
-        for col in numeric_columns:
-            df_clean[col].fillna(df_clean[col].median(), inplace=True)
+        numeric_medians = df.select_dtypes(include=[np.number]).median()
+        df_clean = df.fillna(numeric_medians.to_dict())
         
         # Textspalten mit 'Unknown' füllen
         text_columns = df_clean.select_dtypes(include=['object']).columns
-        for col in text_columns:
-            df_clean[col].fillna('Unknown', inplace=True)
+        df_clean = df_clean.fillna({col: 'Unknown' for col in text_columns})
         
         self.logger.info("Fehlende Werte behandelt")
         return df_clean
@@ -127,21 +341,14 @@ class ASRSDataProcessor:
             self.logger.warning(f"Spalte {aircraft_column} nicht gefunden")
             return df
         
-        df_std = df.copy()
+        df_std = df.copy(deep=False)  # Nur neue/ersetzte Spalten werden angelegt
         df_std[aircraft_column] = df_std[aircraft_column].fillna('Unknown').astype(str).str.lower()
         
         # Standardisierung basierend auf bekannten Flugzeugtypen
-        def standardize_type(aircraft_type):
-            aircraft_type = aircraft_type.lower().strip()
-            
-            for manufacturer, types in self.aircraft_types.items():
-                for ac_type in types:
-                    if ac_type in aircraft_type:
-                        return f"{manufacturer}_{ac_type}"
-            
-            return 'other'
-        
-        df_std[f'{aircraft_column}_standardized'] = df_std[aircraft_column].apply(standardize_type)
+        df_std[f'{aircraft_column}_standardized'] = (
+            df_std[aircraft_column].str.extract(self._ac_pattern, expand=False)
+            .map(self._ac_map).fillna('other')
+        )
         
         self.logger.info("Flugzeugtypen standardisiert")
         return df_std
@@ -161,23 +368,34 @@ class ASRSDataProcessor:
             self.logger.warning(f"Spalte {phase_column} nicht gefunden")
             return df
         
-        df_std = df.copy()
+        df_std = df.copy(deep=False)
         df_std[phase_column] = df_std[phase_column].fillna('Unknown').astype(str).str.lower()
         
-        def standardize_phase(phase):
-            phase = phase.lower().strip()
-            
-            for std_phase in self.flight_phases:
-                if std_phase in phase:
-                    return std_phase
-            
-            return 'other'
-        
-        df_std[f'{phase_column}_standardized'] = df_std[phase_column].apply(standardize_phase)
+        df_std[f'{phase_column}_standardized'] = (
+            df_std[phase_column].str.extract(self._phase_pattern, expand=False).fillna('other')
+        )
         
         self.logger.info("Flugphasen standardisiert")
         return df_std
     
+    def _guess_date_format(self, dates: pd.Series) -> str:
+        """
+        Erkennt das Datumsformat anhand der ersten nicht-leeren Werte.
+        
+        Args:
+            dates: Serie mit Datumswerten
+            
+        Returns:
+            strftime-Format oder 'mixed', falls kein Format erkannt wird
+        """
+        # Einige Werte prüfen, da fehlende Daten bereits als 'Unknown' gefüllt sein können
+        for value in dates.dropna().head(10):
+            fmt = guess_datetime_format(str(value))
+            if fmt:
+                return fmt
+        
+        return 'mixed'
+    
     def extract_date_features(self, df: pd.DataFrame, date_column: str = 'date') -> pd.DataFrame:
         """
         Extrahiert Datums-Features für Jahresanalyse.
@@ -193,16 +411,21 @@ class ASRSDataProcessor:
             self.logger.warning(f"Spalte {date_column} nicht gefunden")
             return df
         
-        df_date = df.copy()
+        df_date = df.copy(deep=False)
         
-        # Datum parsen
-        df_date[date_column] = pd.to_datetime(df_date[date_column], errors='coerce')
+        # Datum parsen (Format einmal erkennen statt zeilenweiser Inferenz)
+        if not pd.api.types.is_datetime64_any_dtype(df_date[date_column]):
+            df_date[date_column] = pd.to_datetime(
+                df_date[date_column], format=self._guess_date_format(df_date[date_column]),
+                errors='coerce', cache=True
+            )
         
         # Features extrahieren
-        df_date['year'] = df_date[date_column].dt.year
-        df_date['month'] = df_date[date_column].dt.month
-        df_date['quarter'] = df_date[date_column].dt.quarter
-        df_date['day_of_week'] = df_date[date_column].dt.dayofweek
+        dt = df_date[date_column].dt
+        df_date['year'] = dt.year
+        df_date['month'] = dt.month
+        df_date['quarter'] = dt.quarter
+        df_date['day_of_week'] = dt.dayofweek
         
         self.logger.info("Datums-Features extrahiert")
         return df_date
@@ -220,19 +443,8 @@ class ASRSDataProcessor:
         if pd.isna(text) or text == '':
             return ''
         
-        # Text zu Kleinbuchstaben
-        text = str(text).lower()
-        
-        # Sonderzeichen entfernen (außer Buchstaben, Zahlen und Leerzeichen)
-        text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-        
-        # Mehrfache Leerzeichen durch einzelne ersetzen
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Führende und nachfolgende Leerzeichen entfernen
-        text = text.strip()
-        
-        return text
+        # Kleinbuchstaben, Sonderzeichen und mehrfache Leerzeichen in einem Durchlauf ersetzen
+        return _RE_CLEAN.sub(' ', str(text).lower()).strip()
     
     def process_data(self, df: pd.DataFrame, text_columns: List[str] = None) -> Dict:
         """
@@ -247,8 +459,25 @@ class ASRSDataProcessor:
         """
         self.logger.info("Starte Datenvorverarbeitung")
         
-        # 1. Motorbezogene Berichte filtern
-        df_filtered = self.filter_motor_related(df, text_columns)
+        processed_columns = [col for col in text_columns if col in df.columns] if text_columns else []
+        
+        # 1. Motorbezogene Berichte filtern (mit Polars inklusive Textvorverarbeitung in einem Plan)
+        df_filtered = None
+        if POLARS_AVAILABLE:
+            try:
+                df_filtered = self._filter_and_clean_polars(df, text_columns, processed_columns)
+            except Exception as e:
+                self.logger.warning(f"Polars-Pfad fehlgeschlagen, verwende pandas: {e}")
+        
+        if df_filtered is None and DASK_AVAILABLE and len(df) >= self.dask_min_rows:
+            try:
+                df_filtered = self._filter_and_clean_dask(df, text_columns, processed_columns)
+            except Exception as e:
+                self.logger.warning(f"Dask-Pfad fehlgeschlagen, verwende pandas: {e}")
+        
+        text_processed = df_filtered is not None
+        if df_filtered is None:
+            df_filtered = self.filter_motor_related(df, text_columns)
         
         # 2. Fehlende Werte behandeln
         df_clean = self.handle_missing_values(df_filtered)
@@ -267,10 +496,12 @@ class ASRSDataProcessor:
             df_clean = self.extract_date_features(df_clean, date_columns[0])
         
         # 6. Text vorverarbeiten
-        if text_columns:
-            available_text_columns = [col for col in text_columns if col in df_clean.columns]
-            for col in available_text_columns:
-                df_clean[f'{col}_processed'] = df_clean[col].apply(self.preprocess_text)
+        if not text_processed:
+            for col in processed_columns:
+                df_clean[f'{col}_processed'] = (
+                    df_clean[col].fillna('').astype(str).str.lower()
+                    .str.replace(_RE_CLEAN, ' ', regex=True).str.strip()
+                )
         
         # Statistiken erstellen
         stats = {
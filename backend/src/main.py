@@ -1,23 +1,41 @@
 import os
 import sys
+import logging
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.asrs import asrs_bp
+from src.routes.asrs import asrs_bp, model_comparer
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
+# Im Produktivbetrieb nur Warnungen und Fehler protokollieren
+app.logger.setLevel(logging.WARNING)
+
 # CORS konfigurieren für Frontend-Backend-Kommunikation
 CORS(app, origins="*")
 
+# JSON-Antworten (Berichte, Vergleichsdaten) komprimiert ausliefern. Gestreamte Antworten
+# ausnehmen: Flask-Compress würde sie dafür vollständig im Speicher zusammensetzen
+if COMPRESS_AVAILABLE:
+    app.config['COMPRESS_STREAMS'] = False
+    Compress(app)
+
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(asrs_bp, url_prefix='/api/asrs')
 
+# Modelle beim Start vorwärmen; mit gunicorn --preload teilen sich die Worker die Gewichte
+model_comparer.warmup()
+
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -43,4 +61,5 @@ def serve(path):
 
 
 if __name__ == '__main__':
+    app.logger.setLevel(logging.DEBUG)
     app.run(host='0.0.0.0', port=5002, debug=True)
@@ -2,18 +2,26 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Tuple
 import logging
+import os
+import re
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.svm import SVC
+from sklearn.svm import LinearSVC
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.preprocessing import LabelEncoder
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
 import warnings
 warnings.filterwarnings('ignore')
 
 try:
     from transformers import AutoTokenizer, AutoModel, pipeline
     from keybert import KeyBERT
+    from keybert.backend import BaseEmbedder
+    from sentence_transformers import SentenceTransformer
     import torch
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
@@ -22,12 +30,151 @@ except ImportError:
 
 try:
     from gensim import corpora
-    from gensim.models import LdaModel
+    from gensim.models import LdaMulticore
     GENSIM_AVAILABLE = True
 except ImportError:
     GENSIM_AVAILABLE = False
     logging.warning("Gensim nicht verfügbar. LDA-Modell wird nicht funktionieren.")
 
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+def _identity_analyzer(tokens: List[str]) -> List[str]:
+    """Analyzer für bereits tokenisierte Dokumente (modulweit, damit picklebar)."""
+    return tokens
+
+# Ablage für exportierte/quantisierte ONNX-Modelle
+QUANTIZED_MODEL_DIR = '/tmp/asrs_models'
+
+DISTILBERT_MODEL_NAME = 'distilbert-base-uncased-finetuned-sst-2-english'
+
+# Standardmodell von KeyBERT; ASRS-Narrative bringen über 128 Tokens hinaus kaum Information
+KEYBERT_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+KEYBERT_MAX_SEQ_LENGTH = 128
+
+# ASRS_INT8=1: KeyBERT-Encoder auf CPU als INT8-quantisiertes ONNX-Modell ausführen
+INT8_ENCODER = os.environ.get('ASRS_INT8') == '1'
+
+# Batch-Größe für die Transformer-Modelle (über /analyze anpassbar)
+DEFAULT_BATCH_SIZE = 64
+
+# Batch-Größe des laufenden Aufrufs; das Embedder-Objekt wird von allen Request-Threads geteilt
+_EMBED_BATCH_SIZE: ContextVar = ContextVar('asrs_embed_batch_size', default=None)
+
+# Kategorien für synthetische Labels, in Prioritätsreihenfolge
+LABEL_CATEGORIES = {
+    'engine_failure': ('failure', 'malfunction', 'shutdown', 'flameout'),
+    'engine_warning': ('warning', 'caution', 'alert', 'indication'),
+    'maintenance': ('maintenance', 'inspection', 'repair', 'replace'),
+    'performance': ('performance', 'power', 'thrust', 'rpm', 'egt'),
+    'other': ()
+}
+
+# Pro Kategorie ein beim Import kompiliertes Alternationsmuster für den vektorisierten Pfad
+_LABEL_PATTERNS = {
+    category: re.compile('|'.join(map(re.escape, keywords)))
+    for category, keywords in LABEL_CATEGORIES.items() if category != 'other'
+}
+
+if TRANSFORMERS_AVAILABLE:
+    class BatchedSentenceEmbedder(BaseEmbedder):
+        """
+        KeyBERT-Backend, das Dokumente und Kandidaten in festen Batches einbettet.
+        
+        Läuft ohne Autograd (inference_mode) und auf der GPU mit FP16-Autocast. Mit
+        ASRS_INT8=1 wird auf der CPU ein dynamisch INT8-quantisiertes ONNX-Modell verwendet.
+        """
+        
+        def __init__(self, model_name: str = KEYBERT_MODEL_NAME, batch_size: int = DEFAULT_BATCH_SIZE,
+                     max_seq_length: int = KEYBERT_MAX_SEQ_LENGTH):
+            super().__init__()
+            self.logger = logging.getLogger(__name__)
+            self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+            self.batch_size = batch_size
+            self.max_seq_length = max_seq_length
+            
+            self._ort_model = None
+            if INT8_ENCODER and OPTIMUM_AVAILABLE and self.device == 'cpu':
+                try:
+                    self._ort_model, self._tokenizer = self._load_int8_encoder(model_name)
+                    return
+                except Exception as e:
+                    self.logger.warning(f"INT8-Encoder konnte nicht geladen werden, verwende PyTorch: {e}")
+            
+            self.embedding_model = SentenceTransformer(model_name, device=self.device)
+            self.embedding_model.max_seq_length = max_seq_length
+        
+        @contextmanager
+        def using_batch_size(self, batch_size: int):
+            """Setzt die Batch-Größe nur für den aktuellen Kontext (Thread), ohne das geteilte Objekt zu ändern."""
+            token = _EMBED_BATCH_SIZE.set(batch_size)
+            try:
+                yield
+            finally:
+                _EMBED_BATCH_SIZE.reset(token)
+        
+        def _current_batch_size(self) -> int:
+            return _EMBED_BATCH_SIZE.get() or self.batch_size
+        
+        def _load_int8_encoder(self, model_name: str):
+            """Exportiert und quantisiert den Encoder einmalig nach ONNX (INT8) und lädt ihn."""
+            save_dir = os.path.join(QUANTIZED_MODEL_DIR, 'minilm-int8')
+            if not os.path.exists(os.path.join(save_dir, 'model_quantized.onnx')):
+                onnx_model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+                quantizer = ORTQuantizer.from_pretrained(onnx_model)
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+                quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+            
+            model = ORTModelForFeatureExtraction.from_pretrained(
+                save_dir, file_name='model_quantized.onnx', provider='CPUExecutionProvider'
+            )
+            return model, AutoTokenizer.from_pretrained(model_name)
+        
+        def _embed_int8(self, documents: List[str]) -> np.ndarray:
+            """Bettet Texte mit dem ONNX-Modell ein (Mean-Pooling + L2-Normierung wie all-MiniLM-L6-v2)."""
+            batch_size = self._current_batch_size()
+            batches = []
+            for start in range(0, len(documents), batch_size):
+                encoded = self._tokenizer(
+                    documents[start:start + batch_size], padding=True, truncation=True,
+                    max_length=self.max_seq_length, return_tensors='pt'
+                )
+                hidden = self._ort_model(**encoded).last_hidden_state
+                mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                batches.append(torch.nn.functional.normalize(pooled, p=2, dim=1).numpy())
+            
+            if not batches:
+                return np.empty((0, self._ort_model.config.hidden_size), dtype=np.float32)
+            return np.concatenate(batches)
+        
+        def embed(self, documents: List[str], verbose: bool = False) -> np.ndarray:
+            if self._ort_model is not None:
+                with torch.inference_mode():
+                    return self._embed_int8(documents).astype(np.float32, copy=False)
+            
+            with torch.inference_mode(), torch.autocast('cuda', dtype=torch.float16, enabled=self.device == 'cuda'):
+                embeddings = self.embedding_model.encode(
+                    documents, batch_size=self._current_batch_size(), convert_to_numpy=True, show_progress_bar=verbose
+                )
+            return embeddings.astype(np.float32, copy=False)
+
 class ModelComparer:
     """
     Klasse für den Vergleich verschiedener NLP-Modelle zur Analyse von ASRS-Berichten.
@@ -39,6 +186,18 @@ class ModelComparer:
         self.results = {}
         self.vectorizers = {}
         
+        # Gemeinsamer Tokenizer (lowercase, Wort-Tokens, englische Stoppwörter) für TF-IDF und LDA
+        self._analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+        
+        self.label_categories = LABEL_CATEGORIES
+        self._label_patterns = _LABEL_PATTERNS
+        self._label_hs_db = self._build_label_hyperscan_db() if HYPERSCAN_AVAILABLE else None
+        # Portable Alternative ohne Hyperscan: Aho-Corasick-Automat über alle Keywords
+        self._label_automaton = (
+            self._build_label_automaton()
+            if self._label_hs_db is None and AHOCORASICK_AVAILABLE else None
+        )
+        
         # Initialisiere verfügbare Modelle
         self._initialize_models()
     
@@ -48,8 +207,8 @@ class ModelComparer:
         # TF-IDF + SVM
         self.models['tfidf_svm'] = {
             'name': 'TF-IDF + SVM',
-            'vectorizer': TfidfVectorizer(max_features=5000, stop_words='english'),
-            'classifier': SVC(kernel='rbf', random_state=42),
+            'vectorizer': TfidfVectorizer(max_features=5000, analyzer=_identity_analyzer),
+            'classifier': LinearSVC(random_state=42, dual='auto'),
             'type': 'classification'
         }
         
@@ -64,9 +223,11 @@ class ModelComparer:
         # KeyBERT für Keyword-Extraktion
         if TRANSFORMERS_AVAILABLE:
             try:
+                embedder = BatchedSentenceEmbedder()
                 self.models['keybert'] = {
                     'name': 'KeyBERT',
-                    'model': KeyBERT(),
+                    'model': KeyBERT(model=embedder),
+                    'embedder': embedder,
                     'type': 'keyword_extraction'
                 }
             except Exception as e:
@@ -77,8 +238,7 @@ class ModelComparer:
             try:
                 self.models['distilbert'] = {
                     'name': 'DistilBERT',
-                    'model': pipeline('text-classification', 
-                                    model='distilbert-base-uncased-finetuned-sst-2-english'),
+                    'model': self._load_distilbert_pipeline(),
                     'type': 'classification'
                 }
             except Exception as e:
@@ -86,6 +246,70 @@ class ModelComparer:
         
         self.logger.info(f"Initialisierte Modelle: {list(self.models.keys())}")
     
+    def _load_distilbert_pipeline(self):
+        """
+        Lädt die DistilBERT-Pipeline.
+        
+        Auf CPU wird, falls optimum verfügbar ist, ein dynamisch INT8-quantisiertes
+        ONNX-Modell mit ONNX Runtime verwendet; sonst die PyTorch-Pipeline.
+        
+        Returns:
+            Text-Classification-Pipeline
+        """
+        if torch.cuda.is_available():
+            return pipeline('text-classification', model=DISTILBERT_MODEL_NAME, device=0)
+        
+        if OPTIMUM_AVAILABLE:
+            try:
+                save_dir = os.path.join(QUANTIZED_MODEL_DIR, 'distilbert-int8')
+                if not os.path.exists(os.path.join(save_dir, 'model_quantized.onnx')):
+                    onnx_model = ORTModelForSequenceClassification.from_pretrained(DISTILBERT_MODEL_NAME, export=True)
+                    quantizer = ORTQuantizer.from_pretrained(onnx_model)
+                    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                    quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+                
+                model = ORTModelForSequenceClassification.from_pretrained(
+                    save_dir, file_name='model_quantized.onnx', provider='CPUExecutionProvider'
+                )
+                tokenizer = AutoTokenizer.from_pretrained(DISTILBERT_MODEL_NAME)
+                return pipeline('text-classification', model=model, tokenizer=tokenizer)
+            except Exception as e:
+                self.logger.warning(f"Quantisiertes DistilBERT konnte nicht geladen werden, verwende PyTorch: {e}")
+        
+        return pipeline('text-classification', model=DISTILBERT_MODEL_NAME, device=-1)
+    
+    def _build_label_hyperscan_db(self):
+        """Kompiliert alle Kategorie-Keywords in eine Hyperscan-Datenbank (Pattern-ID = Kategorie-Index)."""
+        expressions, ids = [], []
+        for category_id, keywords in enumerate(self.label_categories.values()):
+            for keyword in keywords:
+                expressions.append(keyword.encode())
+                ids.append(category_id)
+        
+        try:
+            db = hyperscan.Database()
+            db.compile(
+                expressions=expressions,
+                ids=ids,
+                elements=len(expressions),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions)
+            )
+            return db
+        except Exception as e:
+            self.logger.warning(f"Hyperscan-Datenbank konnte nicht kompiliert werden: {e}")
+            return None
+    
+    def _build_label_automaton(self):
+        """Baut einen Aho-Corasick-Automaten über alle Kategorie-Keywords (Wert = Kategorie-Index)."""
+        automaton = ahocorasick.Automaton()
+        for category_id, keywords in enumerate(self.label_categories.values()):
+            for keyword in keywords:
+                # Bei mehrfach vorkommenden Keywords gewinnt die höher priorisierte Kategorie
+                if keyword not in automaton:
+                    automaton.add_word(keyword, category_id)
+        automaton.make_automaton()
+        return automaton
+    
     def get_available_models(self) -> List[str]:
         """
         Gibt eine Liste der verfügbaren Modelle zurück.
@@ -95,6 +319,31 @@ class ModelComparer:
         """
         return list(self.models.keys())
     
+    def warmup(self):
+        """
+        Führt jedes Modell einmal mit einem kurzen Dummy-Text aus.
+        
+        Beim Start aufgerufen (mit gunicorn --preload im Master-Prozess), damit die erste
+        Analyse nicht die einmaligen Initialisierungskosten der Transformer-Modelle trägt.
+        """
+        warmup_text = 'engine vibration warning during cruise'
+        
+        self.tokenize([warmup_text])
+        
+        if 'keybert' in self.models:
+            try:
+                self.models['keybert']['model'].extract_keywords(warmup_text, top_n=1)
+            except Exception as e:
+                self.logger.warning(f"KeyBERT-Warmup fehlgeschlagen: {e}")
+        
+        if 'distilbert' in self.models:
+            try:
+                self.models['distilbert']['model']([warmup_text], truncation=True)
+            except Exception as e:
+                self.logger.warning(f"DistilBERT-Warmup fehlgeschlagen: {e}")
+        
+        self.logger.info("Modelle vorgewärmt")
+    
     def prepare_classification_data(self, df: pd.DataFrame, text_column: str, 
                                   target_column: str = None) -> Tuple[List[str], List[str]]:
         """
@@ -129,73 +378,104 @@ class ModelComparer:
             Liste von Labels
         """
         labels = []
+        categories = self.label_categories
         
-        # Definiere Kategorien basierend auf Keywords
-        categories = {
-            'engine_failure': ['failure', 'malfunction', 'shutdown', 'flameout'],
-            'engine_warning': ['warning', 'caution', 'alert', 'indication'],
-            'maintenance': ['maintenance', 'inspection', 'repair', 'replace'],
-            'performance': ['performance', 'power', 'thrust', 'rpm', 'egt'],
-            'other': []
-        }
+        if self._label_hs_db is not None:
+            category_names = list(categories.keys())
+            
+            def on_match(pattern_id, start, end, flags, context):
+                context.add(pattern_id)
+            
+            for text in texts:
+                matched = set()
+                self._label_hs_db.scan(text.encode('utf-8'), match_event_handler=on_match, context=matched)
+                # Erste Kategorie in Prioritätsreihenfolge gewinnt
+                labels.append(category_names[min(matched)] if matched else 'other')
+            
+            return labels
         
-        for text in texts:
-            text_lower = text.lower()
-            assigned = False
+        if self._label_automaton is not None:
+            category_names = list(categories.keys())
             
-            for category, keywords in categories.items():
-                if category == 'other':
-                    continue
-                    
-                if any(keyword in text_lower for keyword in keywords):
-                    labels.append(category)
-                    assigned = True
-                    break
+            for text in texts:
+                matched = {category_id for _, category_id in self._label_automaton.iter(text.lower())}
+                # Erste Kategorie in Prioritätsreihenfolge gewinnt
+                labels.append(category_names[min(matched)] if matched else 'other')
             
-            if not assigned:
-                labels.append('other')
+            return labels
         
-        return labels
+        # Vektorisiert in Prioritätsreihenfolge: jede Kategorie prüft nur noch nicht zugeordnete Texte
+        remaining = pd.Series(texts, dtype=object).str.lower()
+        result = pd.Series('other', index=remaining.index, dtype=object)
+        
+        for category, pattern in self._label_patterns.items():
+            if remaining.empty:
+                break
+            hit = remaining.str.contains(pattern, regex=True, na=False)
+            result[hit.index[hit]] = category
+            remaining = remaining[~hit]
+        
+        return result.tolist()
     
-    def run_tfidf_svm(self, texts: List[str], labels: List[str]) -> Dict[str, Any]:
+    def tokenize(self, texts: List[str]) -> List[List[str]]:
+        """
+        Tokenisiert Texte einmalig für alle tokenbasierten Modelle.
+        
+        Args:
+            texts: Liste von Texten
+            
+        Returns:
+            Liste von Token-Listen
+        """
+        return [self._analyzer(text) for text in texts]
+    
+    def run_tfidf_svm(self, texts: List[str], labels: List[str],
+                      tokens: List[List[str]] = None, label_counts: Counter = None) -> Dict[str, Any]:
         """
         Führt TF-IDF + SVM Klassifikation durch.
         
         Args:
             texts: Liste von Texten
             labels: Liste von Labels
+            tokens: Bereits tokenisierte Texte (optional)
+            label_counts: Bereits gezählte Label-Häufigkeiten (optional)
             
         Returns:
             Dictionary mit Ergebnissen
         """
         try:
+            if tokens is None:
+                tokens = self.tokenize(texts)
+            
             # Überprüfe Klassenverteilung
-            label_counts = pd.Series(labels).value_counts()
-            min_class_size = label_counts.min()
+            if label_counts is None:
+                label_counts = Counter(labels)
+            min_class_size = min(label_counts.values(), default=0)
             
             # Wenn zu wenige Daten für stratifizierte Aufteilung, verwende einfache Aufteilung
             if min_class_size < 2 or len(texts) < 10:
                 # Für sehr kleine Datensätze: verwende alle Daten für Training und Testing
                 if len(texts) < 5:
                     X_train, X_test = texts, texts
+                    tokens_train, tokens_test = tokens, tokens
                     y_train, y_test = labels, labels
                     self.logger.warning(f"Sehr kleiner Datensatz ({len(texts)} Samples). Verwende alle Daten für Training und Testing.")
                 else:
                     # Einfache Aufteilung ohne Stratifikation
-                    X_train, X_test, y_train, y_test = train_test_split(
-                        texts, labels, test_size=0.2, random_state=42
+                    X_train, X_test, tokens_train, tokens_test, y_train, y_test = train_test_split(
+                        texts, tokens, labels, test_size=0.2, random_state=42
                     )
                     self.logger.warning(f"Kleine Klassengrößen (min: {min_class_size}). Verwende einfache Aufteilung ohne Stratifikation.")
             else:
                 # Normale stratifizierte Aufteilung
-                X_train, X_test, y_train, y_test = train_test_split(
-                    texts, labels, test_size=0.2, random_state=42, stratify=labels
+                X_train, X_test, tokens_train, tokens_test, y_train, y_test = train_test_split(
+                    texts, tokens, labels, test_size=0.2, random_state=42, stratify=labels
                 )
             
             # TF-IDF Vektorisierung
             vectorizer = self.models['tfidf_svm']['vectorizer']
-            X_train_tfidf = vectorizer.fit_transform(X_train)
-            X_test_tfidf = vectorizer.transform(X_test)
+            X_train_tfidf = vectorizer.fit_transform(tokens_train)
+            X_test_tfidf = vectorizer.transform(tokens_test)
             
             # SVM Training
             classifier = self.models['tfidf_svm']['classifier']
@@ -220,12 +500,13 @@ class ModelComparer:
             
             # Feature Importance (Top TF-IDF Features)
             feature_names = vectorizer.get_feature_names_out()
-            feature_importance = np.abs(classifier.coef_[0]) if hasattr(classifier, 'coef_') else None
+            feature_importance = np.abs(classifier.coef_[0])
             
-            top_features = []
-            if feature_importance is not None:
-                top_indices = np.argsort(feature_importance)[-20:]
-                top_features = [(feature_names[i], float(feature_importance[i])) for i in top_indices]
+            # Nur die Top-20 partitionieren und anschließend sortieren statt des gesamten Vokabulars
+            top_k = min(20, len(feature_importance))
+            top_indices = np.argpartition(feature_importance, -top_k)[-top_k:] if top_k else np.array([], dtype=int)
+            top_indices = top_indices[np.argsort(feature_importance[top_indices])]
+            top_features = [(feature_names[i], float(feature_importance[i])) for i in top_indices]
             
             return {
                 'model_name': 'TF-IDF + SVM',
@@ -237,8 +518,8 @@ class ModelComparer:
                 'data_info': {
                     'train_size': len(X_train),
                     'test_size': len(X_test),
-                    'unique_labels': len(set(labels)),
-                    'label_distribution': label_counts.to_dict()
+                    'unique_labels': len(label_counts),
+                    'label_distribution': dict(label_counts)
                 }
             }
             
@@ -246,13 +527,15 @@ class ModelComparer:
             self.logger.error(f"Fehler bei TF-IDF + SVM: {e}")
             return {'error': str(e)}
     
-    def run_lda_analysis(self, texts: List[str], num_topics: int = 5) -> Dict[str, Any]:
+    def run_lda_analysis(self, texts: List[str], num_topics: int = 5,
+                         tokens: List[List[str]] = None) -> Dict[str, Any]:
         """
         Führt LDA Topic Modeling durch.
         
         Args:
             texts: Liste von Texten
             num_topics: Anzahl der Topics
+            tokens: Bereits tokenisierte Texte (optional)
             
         Returns:
             Dictionary mit Ergebnissen
@@ -262,27 +545,26 @@ class ModelComparer:
         
         try:
             # Text preprocessing für LDA
-            processed_texts = []
-            for text in texts:
-                # Einfache Tokenisierung
-                tokens = text.lower().split()
-                # Entferne sehr kurze Wörter
-                tokens = [token for token in tokens if len(token) > 2]
-                processed_texts.append(tokens)
+            if tokens is None:
+                tokens = self.tokenize(texts)
+            
+            # Entferne sehr kurze Wörter
+            processed_texts = [[token for token in doc if len(token) > 2] for doc in tokens]
             
             # Dictionary und Corpus erstellen
             dictionary = corpora.Dictionary(processed_texts)
             dictionary.filter_extremes(no_below=2, no_above=0.8)
             corpus = [dictionary.doc2bow(text) for text in processed_texts]
             
-            # LDA Modell trainieren
-            lda_model = LdaModel(
+            # LDA Modell trainieren (E-Schritt parallel über mehrere Prozesse)
+            lda_model = LdaMulticore(
                 corpus=corpus,
                 id2word=dictionary,
                 num_topics=num_topics,
+                workers=max(1, (os.cpu_count() or 2) - 1),
                 random_state=42,
                 passes=10,
-                alpha='auto',
+                alpha='symmetric',  # 'auto' wird von LdaMulticore nicht unterstützt
                 per_word_topics=True
             )
             
@@ -309,13 +591,15 @@ class ModelComparer:
             self.logger.error(f"Fehler bei LDA: {e}")
             return {'error': str(e)}
     
-    def run_keybert_analysis(self, texts: List[str], top_k: int = 10) -> Dict[str, Any]:
+    def run_keybert_analysis(self, texts: List[str], top_k: int = 10,
+                             batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
         """
         Führt KeyBERT Keyword-Extraktion durch.
         
         Args:
             texts: Liste von Texten
             top_k: Anzahl der Top-Keywords
+            batch_size: Batch-Größe für die Einbettung von Dokumenten und Kandidaten
             
         Returns:
             Dictionary mit Ergebnissen
@@ -325,22 +609,31 @@ class ModelComparer:
         
         try:
             keybert_model = self.models['keybert']['model']
+            embedder = self.models['keybert']['embedder']
             
             # Keywords für alle Texte extrahieren
             all_keywords = []
-            keyword_freq = {}
+            keyword_freq = Counter()
             
-            for text in texts[:100]:  # Limitiere auf erste 100 Texte für Performance
-                if len(text.strip()) > 10:  # Nur nicht-leere Texte
-                    keywords = keybert_model.extract_keywords(text, keyphrase_ngram_range=(1, 2), 
-                                                            stop_words='english', top_k=top_k)
-                    
-                    for keyword, score in keywords:
-                        all_keywords.append((keyword, score))
-                        keyword_freq[keyword] = keyword_freq.get(keyword, 0) + 1
+            # Limitiere auf erste 100 nicht-leere Texte für Performance
+            docs = [text for text in texts[:100] if len(text.strip()) > 10]
+            
+            # Alle Dokumente in einem Aufruf einbetten (gebündelte Forward-Passes)
+            with embedder.using_batch_size(batch_size):
+                results = keybert_model.extract_keywords(docs, keyphrase_ngram_range=(1, 2), 
+                                                         stop_words='english', top_n=top_k,
+                                                         use_mmr=False) if docs else []
+            if len(docs) == 1:
+                # KeyBERT gibt bei nur einem Dokument eine flache Liste zurück
+                results = [results]
+            
+            for keywords in results:
+                for keyword, score in keywords:
+                    all_keywords.append((keyword, score))
+                    keyword_freq[keyword] += 1
             
             # Top Keywords nach Häufigkeit
-            top_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)[:top_k]
+            top_keywords = keyword_freq.most_common(top_k)
             
             # Durchschnittliche Scores berechnen
             keyword_scores = {}
@@ -350,7 +643,7 @@ class ModelComparer:
                 keyword_scores[keyword].append(score)
             
             avg_keyword_scores = {k: np.mean(v) for k, v in keyword_scores.items()}
-            top_scored_keywords = sorted(avg_keyword_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+            top_scored_keywords = heapq.nlargest(top_k, avg_keyword_scores.items(), key=lambda x: x[1])
             
             return {
                 'model_name': 'KeyBERT',
@@ -364,12 +657,13 @@ class ModelComparer:
             self.logger.error(f"Fehler bei KeyBERT: {e}")
             return {'error': str(e)}
     
-    def run_distilbert_analysis(self, texts: List[str]) -> Dict[str, Any]:
+    def run_distilbert_analysis(self, texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
         """
         Führt DistilBERT Sentiment-Analyse durch.
         
         Args:
             texts: Liste von Texten
+            batch_size: Batch-Größe der Pipeline
             
         Returns:
             Dictionary mit Ergebnissen
@@ -380,23 +674,13 @@ class ModelComparer:
         try:
             distilbert_model = self.models['distilbert']['model']
             
-            # Sentiment-Analyse für Texte (limitiert für Performance)
-            sentiments = []
-            for text in texts[:100]:  # Limitiere auf erste 100 Texte
-                if len(text.strip()) > 10:
-                    result = distilbert_model(text[:512])  # Limitiere Textlänge
-                    sentiments.append(result[0])
+            # Sentiment-Analyse für Texte (limitiert für Performance), gebündelt in Batches
+            batch = [text[:512] for text in texts[:100] if len(text.strip()) > 10]  # Limitiere auf erste 100 Texte
+            sentiments = distilbert_model(batch, batch_size=batch_size, truncation=True) if batch else []
             
             # Sentiment-Verteilung
-            sentiment_counts = {}
-            confidence_scores = []
-            
-            for sentiment in sentiments:
-                label = sentiment['label']
-                score = sentiment['score']
-                
-                sentiment_counts[label] = sentiment_counts.get(label, 0) + 1
-                confidence_scores.append(score)
+            sentiment_counts = dict(Counter(sentiment['label'] for sentiment in sentiments))
+            confidence_scores = [sentiment['score'] for sentiment in sentiments]
             
             return {
                 'model_name': 'DistilBERT Sentiment Analysis',
@@ -411,7 +695,7 @@ class ModelComparer:
             return {'error': str(e)}
     
     def compare_models(self, df: pd.DataFrame, text_column: str, 
-                      target_column: str = None) -> Dict[str, Any]:
+                      target_column: str = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
         """
         Vergleicht alle verfügbaren Modelle.
         
@@ -419,6 +703,7 @@ class ModelComparer:
             df: Input DataFrame
             text_column: Name der Textspalte
             target_column: Name der Zielspalte
+            batch_size: Batch-Größe für die Transformer-Modelle
             
         Returns:
             Dictionary mit Vergleichsergebnissen
@@ -428,11 +713,15 @@ class ModelComparer:
         # Daten vorbereiten
         texts, labels = self.prepare_classification_data(df, text_column, target_column)
         
+        # Korpus einmal tokenisieren und für TF-IDF und LDA wiederverwenden
+        tokens = self.tokenize(texts)
+        label_counts = Counter(labels)
+        
         results = {
             'data_info': {
                 'total_samples': len(texts),
-                'unique_labels': len(set(labels)),
-                'label_distribution': {label: labels.count(label) for label in set(labels)}
+                'unique_labels': len(label_counts),
+                'label_distribution': dict(label_counts)
             },
             'model_results': {}
         }
@@ -440,22 +729,22 @@ class ModelComparer:
         # TF-IDF + SVM
         if 'tfidf_svm' in self.models:
             self.logger.info("Führe TF-IDF + SVM durch")
-            results['model_results']['tfidf_svm'] = self.run_tfidf_svm(texts, labels)
+            results['model_results']['tfidf_svm'] = self.run_tfidf_svm(texts, labels, tokens=tokens, label_counts=label_counts)
         
         # LDA
         if 'lda' in self.models:
             self.logger.info("Führe LDA durch")
-            results['model_results']['lda'] = self.run_lda_analysis(texts)
+            results['model_results']['lda'] = self.run_lda_analysis(texts, tokens=tokens)
         
         # KeyBERT
         if 'keybert' in self.models:
             self.logger.info("Führe KeyBERT durch")
-            results['model_results']['keybert'] = self.run_keybert_analysis(texts)
+            results['model_results']['keybert'] = self.run_keybert_analysis(texts, batch_size=batch_size)
         
         # DistilBERT
         if 'distilbert' in self.models:
             self.logger.info("Führe DistilBERT durch")
-            results['model_results']['distilbert'] = self.run_distilbert_analysis(texts)
+            results['model_results']['distilbert'] = self.run_distilbert_analysis(texts, batch_size=batch_size)
         
         # Modellvergleich-Zusammenfassung
         results['comparison_summary'] = self._create_comparison_summary(results['model_results'])
@@ -1,18 +1,56 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context, send_file
 import pandas as pd
+import numpy as np
 import os
+import io
 import json
+import shutil
+import tempfile
+import uuid
+import hashlib
+import datetime
 from werkzeug.utils import secure_filename
+from werkzeug.http import http_date
 import logging
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
 from src.asrs_data_processor import ASRSDataProcessor
-from src.model_comparer import ModelComparer
+from src.model_comparer import ModelComparer, DEFAULT_BATCH_SIZE
+from src.tasks import CELERY_ENABLED, celery
+from src.session_store import create_session_store, link_session_frame, compact, write_session_report
+
+if CELERY_ENABLED:
+    from celery.result import AsyncResult
+    from src.tasks import preprocess_task, compare_models_task
 
 # Blueprint für ASRS-Analyse-Routen
 asrs_bp = Blueprint('asrs', __name__)
 
 # Konfiguration
 UPLOAD_FOLDER = '/tmp/uploads'
-ALLOWED_EXTENSIONS = {'csv', 'txt'}
+ALLOWED_EXTENSIONS = frozenset({'csv', 'txt'})
+# Reihenfolge bestimmt die Standard-Textspalte im Frontend
+EXPECTED_TEXT_COLUMNS = ('narrative', 'synopsis', 'problem_description', 'text', 'description')
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1 MiB pro Lese-/Schreibaufruf
 
 # Stelle sicher, dass Upload-Ordner existiert
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -21,13 +59,170 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 data_processor = ASRSDataProcessor()
 model_comparer = ModelComparer()
 
-# Temporärer Speicher für verarbeitete Daten
-processed_data_store = {}
+# Speicher für verarbeitete Daten (Redis + Arrow-Dateien, falls ASRS_REDIS_URL gesetzt ist)
+processed_data_store = create_session_store()
+
+def _json_default(value):
+    """Serialisiert Typen, die orjson nicht direkt unterstützt (wie Flasks JSON-Provider)."""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f'Typ {type(value).__name__} ist nicht JSON-serialisierbar')
+
+def _json_bytes(value):
+    """Serialisiert einen Wert mit orjson (Fallback: json-Modul) zu UTF-8-Bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            value,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            default=_json_default
+        )
+    return json.dumps(value, default=_json_default, ensure_ascii=False).encode('utf-8')
+
+def fast_jsonify(payload):
+    """
+    Erstellt eine JSON-Response mit orjson (deutlich schneller als das json-Modul).
+    numpy-Arrays und -Skalare werden direkt serialisiert; ohne orjson wird jsonify verwendet.
+    """
+    if not ORJSON_AVAILABLE:
+        return jsonify(payload)
+    return current_app.response_class(_json_bytes(payload), mimetype='application/json')
+
+def iter_json(value, depth):
+    """
+    Serialisiert einen Wert abschnittsweise: Dictionaries bis zur angegebenen Tiefe
+    werden Schlüssel für Schlüssel ausgegeben, tiefere Werte jeweils am Stück.
+    """
+    if depth <= 0 or not isinstance(value, dict):
+        yield _json_bytes(value)
+        return
+    
+    yield b'{'
+    for i, (key, item) in enumerate(value.items()):
+        yield (b',' if i else b'') + _json_bytes(str(key)) + b':'
+        yield from iter_json(item, depth - 1)
+    yield b'}'
 
 def allowed_file(filename):
     """Überprüft, ob die Datei-Erweiterung erlaubt ist."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_upload(file, filepath):
+    """
+    Speichert eine hochgeladene Datei in großen Blöcken.
+    
+    Liegt der Upload bereits als Datei auf der Platte (von werkzeug gespoolt), wird
+    per os.sendfile direkt im Kernel kopiert, sonst per copyfileobj mit 1-MiB-Puffer.
+    """
+    stream = file.stream
+    start = stream.tell()
+    
+    # Bei SpooledTemporaryFiles die enthaltene Datei verwenden: fileno() auf dem Spool
+    # würde einen noch im Speicher gehaltenen Upload erst auf die Platte schreiben
+    source = stream._file if isinstance(stream, tempfile.SpooledTemporaryFile) else stream
+    try:
+        in_fd = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        in_fd = None  # z.B. BytesIO
+    
+    with open(filepath, 'wb') as out:
+        if in_fd is not None:
+            try:
+                size = os.fstat(in_fd).st_size
+                offset = start
+                while offset < size:
+                    sent = os.sendfile(out.fileno(), in_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                out.seek(0)
+                out.truncate()
+                stream.seek(start)
+        
+        shutil.copyfileobj(stream, out, length=UPLOAD_BUFFER_SIZE)
+
+def count_csv_rows(filepath):
+    """
+    Zählt die Datenzeilen einer CSV-Datei, ohne sie vollständig zu laden.
+    
+    Es wird nur die erste Spalte konvertiert und blockweise gestreamt; anders als ein
+    reines Zeilenzählen bleiben Zeilenumbrüche innerhalb von Anführungszeichen korrekt.
+    """
+    reader = pacsv.open_csv(
+        filepath,
+        # Erste Spalte über ihre Position wählen: pandas und pyarrow benennen leere
+        # Kopfzeilen unterschiedlich ("Unnamed: 0" bzw. ""), daher die Kopfzeile überspringen
+        read_options=pacsv.ReadOptions(block_size=1 << 20, skip_rows=1, autogenerate_column_names=True),
+        # Mehrzeilige Narrative über Blockgrenzen hinweg zulassen
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        # Als Text lesen: der aus dem ersten Block abgeleitete Typ muss für spätere nicht passen
+        convert_options=pacsv.ConvertOptions(
+            include_columns=['f0'],
+            column_types={'f0': pa.string()}
+        )
+    )
+    return sum(batch.num_rows for batch in reader)
+
+def file_digest(filepath):
+    """
+    Berechnet einen Hash der Datei blockweise als Cache-Schlüssel.
+    
+    Kryptografische Stärke ist hier nicht nötig: xxh3 bzw. BLAKE3 (SIMD) sind bei
+    großen Dateien deutlich schneller als SHA-256, das nur als Fallback dient.
+    """
+    digest = _new_digest()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def results_etag(results):
+    """Berechnet einen ETag über den serialisierten Inhalt von Analyseergebnissen."""
+    digest = _new_digest()
+    digest.update(_json_bytes(results))
+    return digest.hexdigest()
+
+def _new_digest():
+    """Erzeugt das schnellste verfügbare Hash-Objekt (xxh3, BLAKE3, sonst SHA-256)."""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64()
+    if BLAKE3_AVAILABLE:
+        return blake3()
+    return hashlib.sha256()
+
+def sample_records(df, n):
+    """
+    Gibt die ersten n Zeilen eines DataFrames als Liste von Dictionaries zurück.
+    
+    Die Umwandlung erfolgt spaltenweise über Arrow statt zellenweise über pandas;
+    fehlende Werte werden dabei zu None.
+    """
+    head = df.head(n)
+    try:
+        return pa.Table.from_pandas(head, preserve_index=False).to_pylist()
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return head.to_dict('records')  # gemischte Objekt-Spalten
+
+def read_csv_overview(filepath, sample_size=3):
+    """
+    Liest Zeilenanzahl, Spaltennamen und die ersten Zeilen einer CSV-Datei.
+    
+    Returns:
+        Tuple von (Zeilenanzahl, Spaltennamen, Beispielzeilen)
+    """
+    # Nur die ersten Zeilen parsen statt der gesamten Datei
+    df_head = pd.read_csv(filepath, nrows=sample_size)
+    column_names = list(df_head.columns)
+    
+    row_count = count_csv_rows(filepath) if len(df_head) == sample_size else len(df_head)
+    
+    return row_count, column_names, sample_records(df_head, sample_size)
+
 @asrs_bp.route('/upload', methods=['POST'])
 def upload_file():
     """
@@ -35,60 +230,60 @@ def upload_file():
     """
     try:
         if 'file' not in request.files:
-            return jsonify({'error': 'Keine Datei gefunden'}), 400
+            return fast_jsonify({'error': 'Keine Datei gefunden'}), 400
         
         file = request.files['file']
         
         if file.filename == '':
-            return jsonify({'error': 'Keine Datei ausgewählt'}), 400
+            return fast_jsonify({'error': 'Keine Datei ausgewählt'}), 400
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             filepath = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(filepath)
+            save_upload(file, filepath)
             
             # Versuche die Datei zu laden und grundlegende Info zu extrahieren
             try:
-                df = pd.read_csv(filepath)
+                row_count, column_names, sample_data = read_csv_overview(filepath)
                 
                 # Validierung: Datei darf nicht leer sein
-                if len(df) == 0:
-                    return jsonify({
+                if row_count == 0:
+                    return fast_jsonify({
                         'error': 'Die hochgeladene CSV-Datei ist leer. Bitte laden Sie eine Datei mit Daten hoch.'
                     }), 400
                 
                 # Validierung: Mindestens eine der erwarteten Textspalten sollte vorhanden sein
-                expected_text_columns = ['narrative', 'synopsis', 'problem_description', 'text', 'description']
-                available_text_columns = [col for col in expected_text_columns if col in df.columns]
+                column_set = frozenset(column_names)
+                available_text_columns = [col for col in EXPECTED_TEXT_COLUMNS if col in column_set]
                 
                 if not available_text_columns:
-                    return jsonify({
-                        'error': f'Keine der erwarteten Textspalten gefunden. Erwartete Spalten: {expected_text_columns}. Gefundene Spalten: {list(df.columns)}'
+                    return fast_jsonify({
+                        'error': f'Keine der erwarteten Textspalten gefunden. Erwartete Spalten: {list(EXPECTED_TEXT_COLUMNS)}. Gefundene Spalten: {column_names}'
                     }), 400
                 
                 file_info = {
                     'filename': filename,
                     'filepath': filepath,
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'column_names': list(df.columns),
+                    'rows': row_count,
+                    'columns': len(column_names),
+                    'column_names': column_names,
                     'available_text_columns': available_text_columns,
-                    'sample_data': df.head(3).to_dict('records') if len(df) > 0 else []
+                    'sample_data': sample_data
                 }
                 
-                return jsonify({
+                return fast_jsonify({
                     'message': 'Datei erfolgreich hochgeladen und validiert',
                     'file_info': file_info
                 }), 200
                 
             except Exception as e:
-                return jsonify({'error': f'Fehler beim Lesen der CSV-Datei: {str(e)}'}), 400
+                return fast_jsonify({'error': f'Fehler beim Lesen der CSV-Datei: {str(e)}'}), 400
         
-        return jsonify({'error': 'Dateityp nicht erlaubt'}), 400
+        return fast_jsonify({'error': 'Dateityp nicht erlaubt'}), 400
         
     except Exception as e:
-        current_app.logger.error(f"Upload-Fehler: {e}")
-        return jsonify({'error': f'Upload-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Upload-Fehler: %s", e)
+        return fast_jsonify({'error': f'Upload-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/preprocess', methods=['POST'])
 def preprocess_data():
@@ -99,74 +294,173 @@ def preprocess_data():
         data = request.get_json()
         
         if not data or 'filepath' not in data:
-            return jsonify({'error': 'Dateipfad erforderlich'}), 400
+            return fast_jsonify({'error': 'Dateipfad erforderlich'}), 400
         
         filepath = data['filepath']
         text_columns = data.get('text_columns', None)
         
         if not os.path.exists(filepath):
-            return jsonify({'error': 'Datei nicht gefunden'}), 404
+            return fast_jsonify({'error': 'Datei nicht gefunden'}), 404
+        
+        session_id = uuid.uuid4().hex
+        
+        # Identische Datei mit gleichen Textspalten bereits verarbeitet: Ergebnis wiederverwenden
+        data_key = f"{file_digest(filepath)}:{','.join(text_columns or [])}"
+        cached = processed_data_store.cache_get(f'preproc:{data_key}')
+        if cached and os.path.exists(cached['data_path']):
+            data_path = link_session_frame(session_id, cached['data_path'])
+            processed_data_store.update(session_id, data_key=data_key)
+            processed_data_store.set_data_path(session_id, data_path)
+            # Auf die neueste Datei verweisen, falls die ältere Session vorher verdrängt wird
+            processed_data_store.cache_set(f'preproc:{data_key}', {'stats': cached['stats'], 'data_path': data_path})
+            df = processed_data_store.get_data(session_id)
+            return _finish_preprocessing(session_id, filepath, df, cached['stats'])
+        
+        # Asynchron: Aufgabe an Celery übergeben und sofort antworten
+        if CELERY_ENABLED:
+            task = preprocess_task.delay(session_id, filepath, text_columns)
+            processed_data_store.update(session_id, filepath=filepath, preprocess_task_id=task.id, data_key=data_key)
+            return fast_jsonify({
+                'message': 'Datenvorverarbeitung gestartet',
+                'session_id': session_id,
+                'task_id': task.id,
+                'status_url': f'/preprocess/status/{session_id}'
+            }), 202
         
         # Daten laden
         df = data_processor.load_data(filepath)
         
         # Validierung: Datei darf nicht leer sein
         if len(df) == 0:
-            return jsonify({
+            return fast_jsonify({
                 'error': 'Die Datei enthält keine Daten zum Verarbeiten.'
             }), 400
         
         # Datenvorverarbeitung durchführen
         result = data_processor.process_data(df, text_columns)
         
-        # Validierung: Überprüfe ob motorbezogene Berichte gefunden wurden
-        if result['stats']['filtered_count'] == 0:
-            return jsonify({
-                'error': 'Keine motorbezogenen Berichte in den Daten gefunden. Überprüfen Sie, ob die Daten relevante Textspalten enthalten.',
-                'stats': result['stats'],
-                'suggestions': [
-                    'Stellen Sie sicher, dass die Textspalten motorbezogene Begriffe enthalten',
-                    'Überprüfen Sie die Spalten: narrative, synopsis, problem_description',
-                    'Verwenden Sie Begriffe wie: engine, motor, turbine, compressor, etc.'
-                ]
-            }), 400
-        
-        # Warnung bei niedriger Filterrate
-        warnings = []
-        if result['stats']['filter_ratio'] < 0.1:
-            warnings.append(f"Niedrige Filterrate ({result['stats']['filter_ratio']*100:.1f}%). Möglicherweise enthält die Datei wenige motorbezogene Berichte.")
-        
-        # Verarbeitete Daten temporär speichern
-        session_id = f"session_{len(processed_data_store)}"
-        processed_data_store[session_id] = {
-            'data': result['data'],
-            'stats': result['stats'],
-            'filepath': filepath
-        }
+        processed_data_store.update(session_id, data_key=data_key)
+        return _finish_preprocessing(session_id, filepath, compact(result['data']), result['stats'], data_key)
         
-        # Statistiken für Response vorbereiten
-        response_stats = result['stats'].copy()
-        response_stats['session_id'] = session_id
+    except Exception as e:
+        current_app.logger.error("Preprocessing-Fehler: %s", e)
+        return fast_jsonify({'error': f'Preprocessing-Fehler: {str(e)}'}), 500
+
+def _finish_preprocessing(session_id, filepath, df, stats, data_key=None):
+    """
+    Validiert das Vorverarbeitungsergebnis, speichert es in der Session und erstellt die Response.
+    Mit data_key wird das Ergebnis zusätzlich für identische Anfragen zwischengespeichert.
+    """
+    # Validierung: Überprüfe ob motorbezogene Berichte gefunden wurden
+    if stats['filtered_count'] == 0:
+        processed_data_store.delete(session_id)
+        return fast_jsonify({
+            'error': 'Keine motorbezogenen Berichte in den Daten gefunden. Überprüfen Sie, ob die Daten relevante Textspalten enthalten.',
+            'stats': stats,
+            'suggestions': [
+                'Stellen Sie sicher, dass die Textspalten motorbezogene Begriffe enthalten',
+                'Überprüfen Sie die Spalten: narrative, synopsis, problem_description',
+                'Verwenden Sie Begriffe wie: engine, motor, turbine, compressor, etc.'
+            ]
+        }), 400
+    
+    # Warnung bei niedriger Filterrate
+    warnings = []
+    if stats['filter_ratio'] < 0.1:
+        warnings.append(f"Niedrige Filterrate ({stats['filter_ratio']*100:.1f}%). Möglicherweise enthält die Datei wenige motorbezogene Berichte.")
+    
+    # Mögliche Textspalten einmalig bestimmen, damit /analyze sie nicht bei jedem Aufruf sucht
+    text_columns = [col for col in stats['columns'] if 'text' in col.lower() or 'narrative' in col.lower()]
+    
+    # Verarbeitete Daten temporär speichern
+    if not processed_data_store.has_data(session_id):
+        processed_data_store.set_data(session_id, df)
+    processed_data_store.update(session_id, stats=stats, filepath=filepath, text_columns=text_columns)
+    
+    if data_key is not None:
+        processed_data_store.cache_set(f'preproc:{data_key}', {
+            'stats': stats,
+            'data_path': processed_data_store.data_path(session_id)
+        })
+    
+    # Statistiken für Response vorbereiten
+    response_stats = stats.copy()
+    response_stats['session_id'] = session_id
+    
+    # Sample der verarbeiteten Daten
+    sample_data = sample_records(df, 5)
+    
+    response = {
+        'message': 'Datenvorverarbeitung erfolgreich',
+        'session_id': session_id,
+        'stats': response_stats,
+        'sample_data': sample_data,
+        'processed_columns': stats['columns']
+    }
+    
+    if warnings:
+        response['warnings'] = warnings
+    
+    return fast_jsonify(response), 200
+
+def _store_analysis_results(session_id, analysis_results):
+    """
+    Speichert Analyseergebnisse in der Session. Der neue ETag macht einen bereits
+    gerenderten Bericht mit abweichendem Inhalt ungültig.
+    """
+    processed_data_store.update(
+        session_id,
+        analysis_results=analysis_results,
+        analysis_etag=results_etag(analysis_results)
+    )
+
+def _clear_analysis_results(session_id):
+    """Entfernt Analyseergebnisse samt ETags, damit kein veralteter Bericht mehr ausgeliefert wird."""
+    processed_data_store.discard(session_id, 'analysis_results', 'analysis_etag', 'report_etag')
+
+def _task_status_response(session_id, task):
+    """
+    Erstellt die Response für eine noch laufende oder fehlgeschlagene Celery-Aufgabe.
+    Gibt None zurück, wenn die Aufgabe erfolgreich abgeschlossen ist.
+    """
+    if task.state == 'FAILURE':
+        return fast_jsonify({'error': f'Aufgabe fehlgeschlagen: {str(task.result)}', 'status': task.state}), 500
+    
+    if task.state != 'SUCCESS':
+        return fast_jsonify({
+            'session_id': session_id,
+            'task_id': task.id,
+            'status': task.state
+        }), 202
+    
+    return None
+
+@asrs_bp.route('/preprocess/status/<session_id>', methods=['GET'])
+def preprocess_status(session_id):
+    """
+    Endpunkt zum Abfragen des Status einer asynchronen Datenvorverarbeitung.
+    """
+    try:
+        session_data = processed_data_store.get(session_id)
         
-        # Sample der verarbeiteten Daten
-        sample_data = result['data'].head(5).to_dict('records') if len(result['data']) > 0 else []
+        if not session_data or 'preprocess_task_id' not in session_data:
+            return fast_jsonify({'error': 'Session nicht gefunden'}), 404
         
-        response = {
-            'message': 'Datenvorverarbeitung erfolgreich',
-            'session_id': session_id,
-            'stats': response_stats,
-            'sample_data': sample_data,
-            'processed_columns': list(result['data'].columns)
-        }
+        task = AsyncResult(session_data['preprocess_task_id'], app=celery)
+        pending = _task_status_response(session_id, task)
+        if pending is not None:
+            return pending
         
-        if warnings:
-            response['warnings'] = warnings
+        payload = task.result
+        if not processed_data_store.has_data(session_id):
+            processed_data_store.set_data_path(session_id, payload['data_path'])
+        df = processed_data_store.get_data(session_id)
         
-        return jsonify(response), 200
+        return _finish_preprocessing(session_id, session_data['filepath'], df, payload['stats'], session_data.get('data_key'))
         
     except Exception as e:
-        current_app.logger.error(f"Preprocessing-Fehler: {e}")
-        return jsonify({'error': f'Preprocessing-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Status-Fehler: %s", e)
+        return fast_jsonify({'error': f'Status-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/analyze', methods=['POST'])
 def analyze_data():
@@ -177,59 +471,133 @@ def analyze_data():
         data = request.get_json()
         
         if not data or 'session_id' not in data:
-            return jsonify({'error': 'Session-ID erforderlich'}), 400
+            return fast_jsonify({'error': 'Session-ID erforderlich'}), 400
         
         session_id = data['session_id']
         text_column = data.get('text_column', 'narrative')
         target_column = data.get('target_column', None)
         models_to_run = data.get('models', ['tfidf_svm'])
+        batch_size = data.get('batch_size', DEFAULT_BATCH_SIZE)
         
         # Validierung: Modell-Liste darf nicht leer sein
         if not models_to_run or len(models_to_run) == 0:
-            return jsonify({'error': 'Mindestens ein Modell muss ausgewählt werden'}), 400
+            return fast_jsonify({'error': 'Mindestens ein Modell muss ausgewählt werden'}), 400
+        
+        # Validierung: Batch-Größe muss eine positive Ganzzahl sein
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+            return fast_jsonify({'error': 'batch_size muss eine positive Ganzzahl sein'}), 400
         
         # Validierung: Überprüfe verfügbare Modelle
         available_models = model_comparer.get_available_models()
         invalid_models = [model for model in models_to_run if model not in available_models]
         if invalid_models:
-            return jsonify({
+            return fast_jsonify({
                 'error': f'Ungültige Modelle: {invalid_models}. Verfügbare Modelle: {available_models}'
             }), 400
         
-        if session_id not in processed_data_store:
-            return jsonify({'error': 'Session nicht gefunden'}), 404
+        session_data = processed_data_store.get(session_id)
+        if session_data is None:
+            return fast_jsonify({'error': 'Session nicht gefunden'}), 404
         
-        # Verarbeitete Daten abrufen
-        session_data = processed_data_store[session_id]
-        df = session_data['data']
+        if 'stats' not in session_data:
+            return fast_jsonify({'error': 'Datenvorverarbeitung ist noch nicht abgeschlossen'}), 409
+        stats = session_data['stats']
+        columns = stats['columns']
         
         # Validierung: Datensatz darf nicht leer sein
-        if len(df) == 0:
-            return jsonify({'error': 'Keine Daten in der Session verfügbar'}), 400
+        if stats['final_count'] == 0:
+            return fast_jsonify({'error': 'Keine Daten in der Session verfügbar'}), 400
+        
+        # Verfügbare Textspalten prüfen (erste beim Preprocessing erkannte Spalte als Ersatz)
+        column_set = frozenset(columns)
+        if text_column not in column_set:
+            text_columns = session_data.get('text_columns')
+            if text_columns:
+                text_column = text_columns[0]
+        
+        if text_column not in column_set:
+            return fast_jsonify({'error': f'Textspalte {text_column} nicht gefunden'}), 400
+        
+        # Fehlende Zielspalte wird wie bisher durch synthetische Labels ersetzt
+        if target_column not in column_set:
+            target_column = None
+        
+        # Gleiche Daten mit gleichen Parametern bereits analysiert: Ergebnis wiederverwenden
+        cache_key = f"analyze:{session_data.get('data_key')}:{text_column}:{target_column}:{','.join(sorted(models_to_run))}"
+        analysis_results = processed_data_store.cache_get(cache_key)
+        if analysis_results is not None:
+            _store_analysis_results(session_id, analysis_results)
+            return fast_jsonify({
+                'message': 'Analyse erfolgreich durchgeführt',
+                'session_id': session_id,
+                'results': analysis_results
+            }), 200
         
-        # Verfügbare Textspalten prüfen
-        available_text_columns = [col for col in df.columns if 'text' in col.lower() or 'narrative' in col.lower()]
-        if text_column not in df.columns and available_text_columns:
-            text_column = available_text_columns[0]
+        # Asynchron: Modellvergleich an die NLP-Queue übergeben
+        if CELERY_ENABLED:
+            data_path = processed_data_store.data_path(session_id)
+            
+            task = compare_models_task.delay(data_path, text_column, target_column, batch_size)
+            processed_data_store.update(session_id, analysis_task_id=task.id, analysis_cache_key=cache_key)
+            _clear_analysis_results(session_id)
+            
+            return fast_jsonify({
+                'message': 'Analyse gestartet',
+                'session_id': session_id,
+                'task_id': task.id,
+                'status_url': f'/analyze/status/{session_id}'
+            }), 202
         
-        if text_column not in df.columns:
-            return jsonify({'error': f'Textspalte {text_column} nicht gefunden'}), 400
+        # Nur die benötigten Spalten laden
+        needed_columns = [text_column] if target_column is None else [text_column, target_column]
+        df = processed_data_store.get_data(session_id, needed_columns)
         
         # Modellvergleich durchführen
-        analysis_results = model_comparer.compare_models(df, text_column, target_column)
+        analysis_results = model_comparer.compare_models(df, text_column, target_column, batch_size)
         
-        # Ergebnisse in Session speichern
-        processed_data_store[session_id]['analysis_results'] = analysis_results
+        # Ergebnisse in Session und Cache speichern
+        _store_analysis_results(session_id, analysis_results)
+        processed_data_store.cache_set(cache_key, analysis_results)
         
-        return jsonify({
+        return fast_jsonify({
             'message': 'Analyse erfolgreich durchgeführt',
             'session_id': session_id,
             'results': analysis_results
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Analyse-Fehler: {e}")
-        return jsonify({'error': f'Analyse-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Analyse-Fehler: %s", e)
+        return fast_jsonify({'error': f'Analyse-Fehler: {str(e)}'}), 500
+
+@asrs_bp.route('/analyze/status/<session_id>', methods=['GET'])
+def analyze_status(session_id):
+    """
+    Endpunkt zum Abfragen des Status einer asynchronen Analyse.
+    """
+    try:
+        session_data = processed_data_store.get(session_id)
+        
+        if not session_data or 'analysis_task_id' not in session_data:
+            return fast_jsonify({'error': 'Session nicht gefunden'}), 404
+        
+        task = AsyncResult(session_data['analysis_task_id'], app=celery)
+        pending = _task_status_response(session_id, task)
+        if pending is not None:
+            return pending
+        
+        # Ergebnisse in Session und Cache speichern
+        _store_analysis_results(session_id, task.result)
+        processed_data_store.cache_set(session_data['analysis_cache_key'], task.result)
+        
+        return fast_jsonify({
+            'message': 'Analyse erfolgreich durchgeführt',
+            'session_id': session_id,
+            'results': task.result
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error("Status-Fehler: %s", e)
+        return fast_jsonify({'error': f'Status-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/compare', methods=['POST'])
 def compare_models():
@@ -240,17 +608,16 @@ def compare_models():
         data = request.get_json()
         
         if not data or 'session_id' not in data:
-            return jsonify({'error': 'Session-ID erforderlich'}), 400
+            return fast_jsonify({'error': 'Session-ID erforderlich'}), 400
         
         session_id = data['session_id']
         
-        if session_id not in processed_data_store:
-            return jsonify({'error': 'Session nicht gefunden'}), 404
-        
-        session_data = processed_data_store[session_id]
+        session_data = processed_data_store.get(session_id)
+        if session_data is None:
+            return fast_jsonify({'error': 'Session nicht gefunden'}), 404
         
         if 'analysis_results' not in session_data:
-            return jsonify({'error': 'Keine Analyseergebnisse gefunden. Führen Sie zuerst eine Analyse durch.'}), 400
+            return fast_jsonify({'error': 'Keine Analyseergebnisse gefunden. Führen Sie zuerst eine Analyse durch.'}), 400
         
         analysis_results = session_data['analysis_results']
         
@@ -261,28 +628,40 @@ def compare_models():
             'recommendations': analysis_results.get('comparison_summary', {}).get('recommendations', [])
         }
         
+        model_results = [
+            (model_name, results)
+            for model_name, results in analysis_results.get('model_results', {}).items()
+            if 'error' not in results
+        ]
+        
+        # Kennzahlen aller Modelle in einem Durchlauf in ein strukturiertes Array übernehmen
+        metrics = np.empty(len(model_results), dtype=[('name', 'O'), ('accuracy', 'f8'), ('kind', 'O')])
+        for i, (model_name, results) in enumerate(model_results):
+            accuracy = results.get('accuracy')
+            metrics[i] = (
+                results.get('model_name', model_name),
+                np.nan if accuracy is None else accuracy,
+                'analysis' if accuracy is None else 'classification'
+            )
+        
         # Performance-Metriken extrahieren
-        for model_name, results in analysis_results.get('model_results', {}).items():
-            if 'error' not in results:
-                model_perf = {
-                    'name': results.get('model_name', model_name),
-                    'type': 'classification' if 'accuracy' in results else 'analysis'
-                }
-                
-                if 'accuracy' in results:
-                    model_perf['accuracy'] = results['accuracy']
-                    model_perf['confusion_matrix'] = results.get('confusion_matrix', [])
-                
-                if 'top_keywords_by_frequency' in results:
-                    model_perf['top_keywords'] = results['top_keywords_by_frequency'][:10]
-                
-                if 'topics' in results:
-                    model_perf['topics'] = results['topics']
-                
-                if 'sentiment_distribution' in results:
-                    model_perf['sentiment_distribution'] = results['sentiment_distribution']
-                
-                comparison_data['model_performance'][model_name] = model_perf
+        for (model_name, results), (name, accuracy, kind) in zip(model_results, metrics.tolist()):
+            model_perf = {'name': name, 'type': kind}
+            
+            if kind == 'classification':
+                model_perf['accuracy'] = accuracy
+                model_perf['confusion_matrix'] = results.get('confusion_matrix', [])
+            
+            if 'top_keywords_by_frequency' in results:
+                model_perf['top_keywords'] = results['top_keywords_by_frequency'][:10]
+            
+            if 'topics' in results:
+                model_perf['topics'] = results['topics']
+            
+            if 'sentiment_distribution' in results:
+                model_perf['sentiment_distribution'] = results['sentiment_distribution']
+            
+            comparison_data['model_performance'][model_name] = model_perf
         
         # Visualisierungsdaten vorbereiten
         comparison_data['visualization_data'] = {
@@ -292,13 +671,12 @@ def compare_models():
             'sentiment_analysis': []
         }
         
-        # Genauigkeitsvergleich
-        for model_name, perf in comparison_data['model_performance'].items():
-            if 'accuracy' in perf:
-                comparison_data['visualization_data']['accuracy_comparison'].append({
-                    'model': perf['name'],
-                    'accuracy': perf['accuracy']
-                })
+        # Genauigkeitsvergleich direkt aus den Spalten des Kennzahlen-Arrays
+        classified = metrics[metrics['kind'] == 'classification']
+        comparison_data['visualization_data']['accuracy_comparison'] = [
+            {'model': name, 'accuracy': accuracy}
+            for name, accuracy in zip(classified['name'].tolist(), classified['accuracy'].tolist())
+        ]
         
         # Keyword-Häufigkeiten (von KeyBERT)
         if 'keybert' in comparison_data['model_performance']:
@@ -308,33 +686,44 @@ def compare_models():
                     {'keyword': kw[0], 'frequency': kw[1]} for kw in keybert_data['top_keywords']
                 ]
         
-        return jsonify({
+        return fast_jsonify({
             'message': 'Modellvergleich erfolgreich',
             'session_id': session_id,
             'comparison': comparison_data
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Vergleichs-Fehler: {e}")
-        return jsonify({'error': f'Vergleichs-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Vergleichs-Fehler: %s", e)
+        return fast_jsonify({'error': f'Vergleichs-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/report', methods=['POST'])
-def generate_report():
+@asrs_bp.route('/report/<session_id>', methods=['GET'])
+def generate_report(session_id=None):
     """
     Endpunkt zur Generierung eines Berichts.
+    
+    Der Bericht wird einmal gerendert und auf der Platte abgelegt; solange sich die
+    Analyseergebnisse nicht ändern, wird die Datei direkt ausgeliefert (per GET auch
+    mit ETag/304 und Range-Anfragen).
     """
     try:
-        data = request.get_json()
-        
-        if not data or 'session_id' not in data:
-            return jsonify({'error': 'Session-ID erforderlich'}), 400
-        
-        session_id = data['session_id']
+        if session_id is None:
+            data = request.get_json()
+            
+            if not data or 'session_id' not in data:
+                return fast_jsonify({'error': 'Session-ID erforderlich'}), 400
+            
+            session_id = data['session_id']
         
-        if session_id not in processed_data_store:
-            return jsonify({'error': 'Session nicht gefunden'}), 404
+        session_data = processed_data_store.get(session_id)
+        if session_data is None:
+            return fast_jsonify({'error': 'Session nicht gefunden'}), 404
         
-        session_data = processed_data_store[session_id]
+        # Analyseergebnisse unverändert: bereits gerenderten Bericht ausliefern
+        etag = session_data.get('analysis_etag')
+        report_path = session_data.get('report_path')
+        if etag is not None and session_data.get('report_etag') == etag and report_path and os.path.exists(report_path):
+            return send_file(report_path, mimetype='application/json', conditional=True, etag=etag)
         
         # Bericht erstellen
         report = {
@@ -392,15 +781,25 @@ def generate_report():
                     f"Vergleich von {len(model_results)} verschiedenen NLP-Modellen durchgeführt."
                 )
         
-        return jsonify({
+        # Bericht abschnittsweise serialisieren (bis in die einzelnen Modellergebnisse), statt
+        # die gesamte Antwort vorab als einen String zu erzeugen
+        payload = {
             'message': 'Bericht erfolgreich generiert',
             'session_id': session_id,
             'report': report
-        }), 200
+        }
+        
+        # Ohne Analyseergebnisse gibt es nichts Wiederverwendbares: direkt streamen
+        if etag is None:
+            return Response(stream_with_context(iter_json(payload, depth=4)), mimetype='application/json'), 200
+        
+        report_path = write_session_report(session_id, iter_json(payload, depth=4))
+        processed_data_store.update(session_id, report_path=report_path, report_etag=etag)
+        return send_file(report_path, mimetype='application/json', conditional=True, etag=etag)
         
     except Exception as e:
-        current_app.logger.error(f"Bericht-Fehler: {e}")
-        return jsonify({'error': f'Bericht-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Bericht-Fehler: %s", e)
+        return fast_jsonify({'error': f'Bericht-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/sessions', methods=['GET'])
 def list_sessions():
@@ -418,21 +817,21 @@ def list_sessions():
             }
             sessions.append(session_info)
         
-        return jsonify({
+        return fast_jsonify({
             'sessions': sessions,
             'total_sessions': len(sessions)
         }), 200
         
     except Exception as e:
-        current_app.logger.error(f"Sessions-Fehler: {e}")
-        return jsonify({'error': f'Sessions-Fehler: {str(e)}'}), 500
+        current_app.logger.error("Sessions-Fehler: %s", e)
+        return fast_jsonify({'error': f'Sessions-Fehler: {str(e)}'}), 500
 
 @asrs_bp.route('/health', methods=['GET'])
 def health_check():
     """
     Gesundheitscheck für die API.
     """
-    return jsonify({
+    return fast_jsonify({
         'status': 'healthy',
         'message': 'ASRS Analysis API ist betriebsbereit',
         'available_models': list(model_comparer.models.keys()),
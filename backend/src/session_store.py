@@ -0,0 +1,410 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from cachetools import TTLCache
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Redis für Session-Metadaten, z.B. redis://localhost:6379/1 - ohne URL bleiben Sessions im Prozess
+REDIS_URL = os.environ.get('ASRS_REDIS_URL')
+SESSION_TTL = int(os.environ.get('ASRS_SESSION_TTL', 3600))
+# Maximale Anzahl gleichzeitig gehaltener Sessions im Prozess
+MAX_SESSIONS = int(os.environ.get('ASRS_MAX_SESSIONS', 64))
+# Gültigkeit zwischengespeicherter Vorverarbeitungs- und Analyseergebnisse
+RESULT_CACHE_TTL = 86400
+# Maximale Anzahl zwischengespeicherter Ergebnisse im Prozess
+MAX_CACHED_RESULTS = int(os.environ.get('ASRS_MAX_CACHED_RESULTS', 128))
+
+# Ablage für vorverarbeitete DataFrames (Arrow IPC), die zwischen Workern und Prozessen geteilt werden
+SESSION_FOLDER = '/tmp/sessions'
+SESSION_FILE_SUFFIX = '.arrow'
+REPORT_FILE_SUFFIX = '.report.json'
+# Metadatenfelder mit Pfaden zu Dateien, die mit der Session gelöscht werden
+SESSION_FILE_FIELDS = ('data_path', 'report_path')
+os.makedirs(SESSION_FOLDER, exist_ok=True)
+
+logger = logging.getLogger(__name__)
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Verkleinert die Datentypen eines DataFrames vor der Ablage in der Session.
+
+    Ganzzahlen werden auf den kleinsten passenden Typ reduziert, Gleitkommazahlen nur,
+    wenn float32 alle Werte exakt darstellt; Textspalten werden als Arrow-Strings statt
+    als Python-Objekte gespeichert.
+
+    Args:
+        df: Verarbeiteter DataFrame
+
+    Returns:
+        DataFrame mit kompakten Datentypen
+    """
+    df = df.copy(deep=False)
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include='float').columns:
+        values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+        # Kein stiller Genauigkeitsverlust (z.B. 1234.56 -> 1234.56005859375)
+        if np.array_equal(values, values.astype('float32'), equal_nan=True):
+            df[col] = df[col].astype('float32')
+    for col in df.select_dtypes(include='object').columns:
+        df[col] = df[col].astype(pd.StringDtype('pyarrow'))
+    return df
+
+
+def session_data_path(session_id: str) -> str:
+    """Gibt den Pfad zur gespeicherten DataFrame-Datei einer Session zurück."""
+    return os.path.join(SESSION_FOLDER, f'{session_id}{SESSION_FILE_SUFFIX}')
+
+
+def write_session_frame(session_id: str, df: pd.DataFrame) -> str:
+    """
+    Speichert einen DataFrame als unkomprimierte Arrow-IPC-Datei.
+
+    Unkomprimiert, damit spätere Zugriffe die Datei per mmap ohne Dekodierung lesen können.
+
+    Args:
+        session_id: ID der Session
+        df: Zu speichernder DataFrame
+
+    Returns:
+        Pfad der gespeicherten Datei
+    """
+    path = session_data_path(session_id)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Erst vollständig schreiben, dann umbenennen: gemappte Dateien werden nie überschrieben
+    tmp_path = f'{path}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_session_report(session_id: str, chunks: Iterable[bytes]) -> str:
+    """
+    Speichert einen gerenderten JSON-Bericht neben den Session-Daten.
+
+    Args:
+        session_id: ID der Session
+        chunks: JSON-Fragmente des Berichts
+
+    Returns:
+        Pfad der gespeicherten Datei
+    """
+    path = os.path.join(SESSION_FOLDER, f'{session_id}{REPORT_FILE_SUFFIX}')
+
+    # Ein gerade ausgelieferter Bericht wird nicht überschrieben, sondern ersetzt
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.writelines(chunks)
+    os.replace(tmp_path, path)
+    return path
+
+
+def link_session_frame(session_id: str, path: str) -> str:
+    """
+    Stellt eine vorhandene Session-Datei unter dem Pfad einer neuen Session bereit.
+
+    Per Hardlink, damit jede Session ihre eigene Datei löschen kann; sonst als Kopie.
+
+    Args:
+        session_id: ID der neuen Session
+        path: Pfad der vorhandenen Datei
+
+    Returns:
+        Pfad der Datei der neuen Session
+    """
+    target = session_data_path(session_id)
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copyfile(path, target)
+    return target
+
+
+def read_session_frame(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lädt einen gespeicherten Session-DataFrame, optional nur ausgewählte Spalten.
+
+    Die Datei wird per mmap eingebunden; Arrow-Strings und Zahlenspalten verweisen
+    direkt auf die gemappten Seiten, statt sie zu kopieren und zu dekodieren.
+
+    Args:
+        path: Pfad der Arrow-IPC-Datei
+        columns: Zu ladende Spalten (None = alle)
+
+    Returns:
+        Geladener DataFrame
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    # Datentypen aus den pandas-Metadaten (z.B. string[pyarrow]) bleiben erhalten
+    return table.to_pandas(split_blocks=True)
+
+
+def _json_default(value):
+    """Wandelt numpy-Werte für json.dumps in Python-Typen um."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def _remove_file(path: Optional[str]):
+    """Entfernt eine Session-Datei, falls vorhanden."""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class InMemorySessionStore:
+    """
+    Session-Speicher im Prozess. Standard ohne Redis; Sessions sind nur in diesem Worker sichtbar.
+
+    Es werden höchstens MAX_SESSIONS Sessions gehalten (älteste zuerst verdrängt), die
+    nach SESSION_TTL ablaufen; zugehörige Session-Dateien werden dabei mit gelöscht.
+    """
+
+    def __init__(self, maxsize: int = MAX_SESSIONS, ttl: int = SESSION_TTL):
+        self._sessions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._files: Dict[str, Dict[str, str]] = {}
+        self._cache = TTLCache(maxsize=MAX_CACHED_RESULTS, ttl=RESULT_CACHE_TTL)
+        # TTLCache ist nicht thread-sicher
+        self._lock = threading.RLock()
+
+    def _remove_evicted_files(self):
+        """Löscht die Dateien verdrängter oder abgelaufener Sessions."""
+        for session_id in [sid for sid in self._files if sid not in self._sessions]:
+            self._remove_session_files(session_id)
+
+    def _remove_session_files(self, session_id: str):
+        """Löscht alle Dateien (Daten, Bericht) einer Session."""
+        for path in self._files.pop(session_id, {}).values():
+            _remove_file(path)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Gibt die Metadaten einer Session zurück (ohne DataFrame)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            return {key: value for key, value in session.items() if key != 'data'}
+
+    def update(self, session_id: str, **fields):
+        """Legt eine Session an bzw. ergänzt ihre Metadaten."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = {}
+                self._remove_evicted_files()
+            session.update(fields)
+            for field in SESSION_FILE_FIELDS:
+                if field in fields:
+                    self._files.setdefault(session_id, {})[field] = fields[field]
+
+    def discard(self, session_id: str, *fields):
+        """Entfernt einzelne Metadatenfelder einer Session."""
+        with self._lock:
+            session = self._sessions.get(session_id, {})
+            for field in fields:
+                session.pop(field, None)
+
+    def has_data(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id, {})
+            return 'data' in session or 'data_path' in session
+
+    def set_data(self, session_id: str, df: pd.DataFrame):
+        """Speichert den verarbeiteten DataFrame einer Session."""
+        self.update(session_id, data=df)
+
+    def set_data_path(self, session_id: str, path: str):
+        """Verknüpft eine bereits gespeicherte Datei (z.B. vom Celery-Worker) mit der Session."""
+        self.update(session_id, data_path=path)
+
+    def get_data(self, session_id: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Gibt den DataFrame einer Session zurück.
+
+        Args:
+            session_id: ID der Session
+            columns: Benötigte Spalten (None = alle)
+
+        Returns:
+            DataFrame oder None, falls keine Daten vorhanden sind
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if 'data' not in session:
+                if 'data_path' not in session:
+                    return None
+                session['data'] = read_session_frame(session['data_path'])
+            df = session['data']
+        return df[columns] if columns is not None else df
+
+    def data_path(self, session_id: str) -> str:
+        """Gibt den Dateipfad der Session-Daten zurück und schreibt sie bei Bedarf auf die Platte."""
+        with self._lock:
+            session = self._sessions[session_id]
+            if 'data_path' not in session:
+                self.update(session_id, data_path=write_session_frame(session_id, session['data']))
+            return session['data_path']
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._remove_session_files(session_id)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with self._lock:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            session = self.get(session_id)
+            if session is not None:
+                yield session_id, session
+
+    def cache_get(self, key: str):
+        """Gibt ein zwischengespeichertes Ergebnis zurück oder None."""
+        with self._lock:
+            return self._cache.get(key)
+
+    def cache_set(self, key: str, value):
+        """Speichert ein Ergebnis für RESULT_CACHE_TTL Sekunden (älteste zuerst verdrängt)."""
+        with self._lock:
+            self._cache[key] = value
+
+
+class RedisSessionStore:
+    """
+    Session-Speicher mit Metadaten in Redis und DataFrames als Arrow-IPC-Dateien.
+
+    Sessions sind damit in allen Gunicorn-Workern sichtbar und laufen nach SESSION_TTL ab.
+    """
+
+    KEY_PREFIX = 'sess:'
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL):
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+
+    def _key(self, session_id: str) -> str:
+        return f'{self.KEY_PREFIX}{session_id}'
+
+    def __contains__(self, session_id: str) -> bool:
+        return bool(self.redis.exists(self._key(session_id)))
+
+    def get(self, session_id: str) -> Optional[dict]:
+        """Gibt die Metadaten einer Session zurück (ohne DataFrame)."""
+        raw = self.redis.hgetall(self._key(session_id))
+        if not raw:
+            return None
+        return {field: json.loads(value) for field, value in raw.items()}
+
+    def update(self, session_id: str, **fields):
+        """Legt eine Session an bzw. ergänzt ihre Metadaten und verlängert die TTL."""
+        key = self._key(session_id)
+        mapping = {field: json.dumps(value, default=_json_default) for field, value in fields.items()}
+        with self.redis.pipeline() as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+
+    def discard(self, session_id: str, *fields):
+        """Entfernt einzelne Metadatenfelder einer Session."""
+        if fields:
+            self.redis.hdel(self._key(session_id), *fields)
+
+    def has_data(self, session_id: str) -> bool:
+        return bool(self.redis.hexists(self._key(session_id), 'data_path'))
+
+    def set_data(self, session_id: str, df: pd.DataFrame):
+        """Speichert den verarbeiteten DataFrame einer Session als Arrow-IPC-Datei."""
+        self._remove_expired_files()
+        self.set_data_path(session_id, write_session_frame(session_id, df))
+
+    def _remove_expired_files(self):
+        """Löscht Session-Dateien, deren Redis-Metadaten bereits abgelaufen sind."""
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(SESSION_FOLDER):
+            for suffix in (SESSION_FILE_SUFFIX, REPORT_FILE_SUFFIX):
+                if entry.name.endswith(suffix) and entry.stat().st_mtime < cutoff:
+                    session_id = entry.name[:-len(suffix)]
+                    if session_id not in self:
+                        _remove_file(entry.path)
+
+    def set_data_path(self, session_id: str, path: str):
+        """Verknüpft eine bereits gespeicherte Datei (z.B. vom Celery-Worker) mit der Session."""
+        self.update(session_id, data_path=path)
+
+    def get_data(self, session_id: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Lädt den DataFrame einer Session; bei Angabe von Spalten werden nur diese gelesen.
+
+        Args:
+            session_id: ID der Session
+            columns: Benötigte Spalten (None = alle)
+
+        Returns:
+            DataFrame oder None, falls keine Daten vorhanden sind
+        """
+        path = self.redis.hget(self._key(session_id), 'data_path')
+        if path is None:
+            return None
+        return read_session_frame(json.loads(path), columns)
+
+    def data_path(self, session_id: str) -> str:
+        """Gibt den Dateipfad der Session-Daten zurück."""
+        return json.loads(self.redis.hget(self._key(session_id), 'data_path'))
+
+    def delete(self, session_id: str):
+        paths = self.redis.hmget(self._key(session_id), SESSION_FILE_FIELDS)
+        self.redis.delete(self._key(session_id))
+        for path in paths:
+            if path is not None:
+                _remove_file(json.loads(path))
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        for key in self.redis.scan_iter(match=f'{self.KEY_PREFIX}*'):
+            session_id = key[len(self.KEY_PREFIX):]
+            session = self.get(session_id)
+            if session is not None:
+                yield session_id, session
+
+    def cache_get(self, key: str):
+        """Gibt ein zwischengespeichertes Ergebnis zurück oder None."""
+        value = self.redis.get(key)
+        return json.loads(value) if value is not None else None
+
+    def cache_set(self, key: str, value):
+        """Speichert ein Ergebnis für RESULT_CACHE_TTL Sekunden."""
+        self.redis.setex(key, RESULT_CACHE_TTL, json.dumps(value, default=_json_default))
+
+
+def create_session_store():
+    """
+    Erstellt den Session-Speicher: Redis, falls ASRS_REDIS_URL gesetzt ist, sonst im Prozess.
+    """
+    if REDIS_URL:
+        if REDIS_AVAILABLE:
+            return RedisSessionStore(REDIS_URL)
+        logger.warning("ASRS_REDIS_URL gesetzt, aber redis ist nicht installiert - Sessions bleiben im Prozess")
+    return InMemorySessionStore()
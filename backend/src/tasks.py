@@ -0,0 +1,106 @@
+import os
+import logging
+
+try:
+    from celery import Celery
+    from celery.signals import worker_process_init
+    CELERY_AVAILABLE = True
+except ImportError:
+    CELERY_AVAILABLE = False
+
+# Broker/Backend, z.B. redis://localhost:6379/0 - ohne Broker laufen die Endpunkte synchron
+CELERY_BROKER_URL = os.environ.get('ASRS_CELERY_BROKER')
+CELERY_RESULT_BACKEND = os.environ.get('ASRS_CELERY_BACKEND', CELERY_BROKER_URL)
+CELERY_ENABLED = CELERY_AVAILABLE and bool(CELERY_BROKER_URL)
+
+from src.session_store import compact, write_session_frame, read_session_frame
+
+logger = logging.getLogger(__name__)
+
+celery = None
+if CELERY_ENABLED:
+    celery = Celery('asrs', broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
+    celery.conf.update(
+        task_serializer='json',
+        result_serializer='json',
+        accept_content=['json'],
+        # Rechenintensive NLP-Aufgaben auf eine eigene Queue legen
+        task_routes={'src.tasks.compare_models_task': {'queue': 'nlp'}}
+    )
+
+# Instanzen werden im Worker erst bei der ersten Aufgabe erzeugt
+_data_processor = None
+_model_comparer = None
+
+
+def run_preprocessing(session_id: str, filepath: str, text_columns=None) -> dict:
+    """
+    Lädt und verarbeitet eine CSV-Datei und speichert das Ergebnis für die Session.
+
+    Args:
+        session_id: ID der Session
+        filepath: Pfad zur CSV-Datei
+        text_columns: Liste der Textspalten
+
+    Returns:
+        Dictionary mit Statistiken und Pfad der gespeicherten Daten
+    """
+    global _data_processor
+    if _data_processor is None:
+        from src.asrs_data_processor import ASRSDataProcessor
+        _data_processor = ASRSDataProcessor()
+
+    df = _data_processor.load_data(filepath)
+    if len(df) == 0:
+        raise ValueError('Die Datei enthält keine Daten zum Verarbeiten.')
+
+    result = _data_processor.process_data(df, text_columns)
+
+    data_path = write_session_frame(session_id, compact(result['data']))
+
+    stats = dict(result['stats'])
+    stats['motor_keywords_found'] = list(stats['motor_keywords_found'])
+
+    return {
+        'stats': stats,
+        'data_path': data_path
+    }
+
+
+def run_model_comparison(data_path: str, text_column: str, target_column: str = None,
+                         batch_size: int = 64) -> dict:
+    """
+    Führt den Modellvergleich auf gespeicherten Session-Daten durch.
+
+    Args:
+        data_path: Pfad der gespeicherten Session-Daten
+        text_column: Name der Textspalte
+        target_column: Name der Zielspalte
+        batch_size: Batch-Größe für die Transformer-Modelle
+
+    Returns:
+        Dictionary mit Vergleichsergebnissen
+    """
+    global _model_comparer
+    if _model_comparer is None:
+        from src.model_comparer import ModelComparer
+        _model_comparer = ModelComparer()
+
+    # Nur die benötigten Spalten aus der gemappten Session-Datei lesen
+    columns = [text_column] if target_column is None else [text_column, target_column]
+    df = read_session_frame(data_path, columns)
+    return _model_comparer.compare_models(df, text_column, target_column, batch_size)
+
+
+if CELERY_ENABLED:
+    @worker_process_init.connect
+    def _limit_torch_threads(**kwargs):
+        """Ein Torch-Thread pro Worker-Prozess, da Celery bereits über Prozesse parallelisiert."""
+        try:
+            import torch
+            torch.set_num_threads(1)
+        except ImportError:
+            pass
+
+    preprocess_task = celery.task(name='src.tasks.preprocess_task')(run_preprocessing)
+    compare_models_task = celery.task(name='src.tasks.compare_models_task')(run_model_comparison)
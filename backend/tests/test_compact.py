@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.session_store import compact
+
+
+def test_floats_keep_precision():
+    df = pd.DataFrame({'altitude': [1234.56, 40.123456]})
+
+    result = compact(df)
+
+    assert result['altitude'].dtype == np.float64
+    assert result['altitude'].tolist() == [1234.56, 40.123456]
+
+
+def test_exact_floats_are_downcast():
+    df = pd.DataFrame({'ratio': [0.5, 1.25, np.nan], 'count': [1, 2, 3]})
+
+    result = compact(df)
+
+    assert result['ratio'].dtype == np.float32
+    assert result['count'].dtype == np.int8
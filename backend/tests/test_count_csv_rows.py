@@ -0,0 +1,41 @@
+import os
+import sys
+import csv
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.routes.asrs import count_csv_rows
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['acn', 'narrative'])
+        writer.writerows(rows)
+
+
+def test_quoted_newlines_across_blocks(tmp_path):
+    path = tmp_path / 'multiline.csv'
+    rows = [(i, f'Engine vibration\nreported in cruise\nreport {i}') for i in range(40_000)]
+    _write_csv(path, rows)
+    assert os.path.getsize(path) > 1 << 20  # mehrere Blöcke
+
+    assert count_csv_rows(str(path)) == len(rows)
+
+
+def test_first_column_type_changes_after_first_block(tmp_path):
+    path = tmp_path / 'mixed.csv'
+    rows = [(i, 'engine') for i in range(200_000)] + [('abc', 'engine')]
+    _write_csv(path, rows)
+
+    assert count_csv_rows(str(path)) == len(rows)
+
+
+def test_empty_first_header(tmp_path):
+    # df.to_csv() schreibt den Index mit leerer Kopfzeile ("Unnamed: 0" in pandas)
+    path = tmp_path / 'indexed.csv'
+    pd.DataFrame({'narrative': ['engine fire'] * 10}).to_csv(path)
+
+    assert count_csv_rows(str(path)) == 10
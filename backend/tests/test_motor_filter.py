@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.asrs_data_processor import ASRSDataProcessor, MOTOR_KEYWORDS
+
+
+def test_plural_and_inflected_keywords_match():
+    narratives = [
+        'Both engines were shut down',
+        'Crew noticed damaged turbines',
+        'The aircraft stalled on approach',
+        'Multiple warnings in the cockpit',
+        'Repeated failures after takeoff',
+        'Fan blades showed cracks',
+        'Passenger spilled coffee in the cabin',
+    ]
+    df = pd.DataFrame({'narrative': narratives})
+
+    filtered = ASRSDataProcessor().filter_motor_related(df, ['narrative'])
+
+    assert list(filtered['narrative']) == narratives[:-1]
+
+
+def test_matches_baseline_substring_search():
+    df = pd.DataFrame({'narrative': [
+        'ENGINES', 'Powered descent', 'oily residue', 'Unrelated report', 'rpms dropped', ''
+    ]})
+    expected = df['narrative'].str.lower().apply(lambda text: any(k in text for k in MOTOR_KEYWORDS))
+
+    filtered = ASRSDataProcessor().filter_motor_related(df, ['narrative'])
+
+    assert list(filtered.index) == list(df.index[expected])
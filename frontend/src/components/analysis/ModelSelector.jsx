@@ -6,6 +6,7 @@ import { Alert, AlertDescription } from '@/components/ui/alert.jsx'
 import { Progress } from '@/components/ui/progress.jsx'
 import { Badge } from '@/components/ui/badge.jsx'
 import { Play, CheckCircle, AlertCircle, Brain, BarChart3 } from 'lucide-react'
+import { resolveTaskResponse } from '@/lib/utils'
 
 const API_BASE_URL = 'http://localhost:5002/api/asrs'
 
@@ -73,7 +74,7 @@ const ModelSelector = ({ sessionData, onAnalysisComplete }) => {
         setAnalysisProgress(prev => Math.min(prev + 5, 90))
       }, 500)
 
-      const response = await fetch(`${API_BASE_URL}/analyze`, {
+      const response = await resolveTaskResponse(await fetch(`${API_BASE_URL}/analyze`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -83,7 +84,7 @@ const ModelSelector = ({ sessionData, onAnalysisComplete }) => {
           text_column: 'narrative',
           models: selectedModels
         }),
-      })
+      }), API_BASE_URL)
 
       clearInterval(progressInterval)
       setAnalysisProgress(100)
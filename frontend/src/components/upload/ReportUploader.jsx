@@ -4,6 +4,7 @@ import { Card, CardContent } from '@/components/ui/card.jsx'
 import { Alert, AlertDescription } from '@/components/ui/alert.jsx'
 import { Progress } from '@/components/ui/progress.jsx'
 import { Upload, FileText, CheckCircle, AlertCircle, X } from 'lucide-react'
+import { resolveTaskResponse } from '@/lib/utils'
 
 const API_BASE_URL = 'http://localhost:5002/api/asrs'
 
@@ -94,7 +95,7 @@ const ReportUploader = ({ onUploadSuccess }) => {
     setPreprocessing(true)
     
     try {
-      const response = await fetch(`${API_BASE_URL}/preprocess`, {
+      const response = await resolveTaskResponse(await fetch(`${API_BASE_URL}/preprocess`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -103,7 +104,7 @@ const ReportUploader = ({ onUploadSuccess }) => {
           filepath: filepath,
           text_columns: ['narrative', 'synopsis', 'problem_description']
         }),
-      })
+      }), API_BASE_URL)
 
       if (!response.ok) {
         const errorData = await response.json()
@@ -4,3 +4,23 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Wartet bei asynchron gestarteten Backend-Aufgaben (HTTP 202) auf das Ergebnis der Status-Route.
+// Unbekannte oder verlorene Celery-Aufgaben bleiben dauerhaft PENDING, daher nach timeoutMs abbrechen.
+export async function resolveTaskResponse(response, apiBaseUrl, intervalMs = 1000, timeoutMs = 15 * 60 * 1000) {
+  if (response.status !== 202) {
+    return response
+  }
+
+  const { status_url: statusUrl } = await response.json()
+  const deadline = Date.now() + timeoutMs
+  let current = response
+  while (current.status === 202) {
+    if (Date.now() >= deadline) {
+      throw new Error('Zeitüberschreitung: Die Aufgabe wurde nicht rechtzeitig abgeschlossen')
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    current = await fetch(`${apiBaseUrl}${statusUrl}`)
+  }
+  return current
+}